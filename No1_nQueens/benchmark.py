@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from nQueens import NQueensSolver
+
+# OEIS A000170（总解数）与 A002562（独立解数），下标为 N - 1
+KNOWN_TOTALS = [1, 0, 0, 2, 10, 4, 40, 92, 352, 724, 2680, 14200, 73712, 365596,
+                2279184, 14772512, 95815104, 666090624]
+KNOWN_DISTINCT = [1, 0, 0, 1, 2, 1, 6, 12, 46, 92, 341, 1787, 9233, 45752,
+                  285053, 1846955, 11977939, 83263591]
+
+
+def run_solve(n, engine):
+    all_solutions, unique_solutions = NQueensSolver(n, engine).solve()
+    return len(all_solutions), len(unique_solutions)
+
+
+def run_parallel(n, engine):
+    all_solutions, unique_solutions = NQueensSolver(n, engine, workers=None).solve()
+    return len(all_solutions), len(unique_solutions)
+
+
+def run_stream(n, engine):
+    total = sum(1 for _ in NQueensSolver(n, engine).iter_solutions())
+    distinct = sum(1 for _ in NQueensSolver(n, engine).iter_solutions(unique=True))
+    return total, distinct
+
+
+def run_count(n, engine):
+    return NQueensSolver(n, engine).count()
+
+
+MODES = {
+    "solve": run_solve,
+    "parallel": run_parallel,
+    "stream": run_stream,
+    "count": run_count,
+}
+
+
+def configurations(engines, modes):
+    for engine in engines:
+        for mode in modes:
+            # count() 只有位运算实现
+            if mode == "count" and engine != "bitmask":
+                continue
+            yield engine, mode
+
+
+def benchmark(n_min, n_max, engines, modes, budget, with_stats):
+    results = []
+    for engine, mode in configurations(engines, modes):
+        skipped = False
+        for n in range(n_min, n_max + 1):
+            if skipped:
+                results.append({"n": n, "engine": engine, "mode": mode, "skipped": True})
+                continue
+
+            started = time.perf_counter()
+            total, distinct = MODES[mode](n, engine)
+            elapsed = time.perf_counter() - started
+            result = {
+                "n": n,
+                "engine": engine,
+                "mode": mode,
+                "seconds": elapsed,
+                "total": total,
+                "distinct": distinct,
+                "ok": total == KNOWN_TOTALS[n - 1] and distinct == KNOWN_DISTINCT[n - 1],
+            }
+            if with_stats and mode == "solve":
+                solver = NQueensSolver(n, engine, instrument=True)
+                solver.solve()
+                result["stats"] = solver.stats.as_dict()
+            results.append(result)
+            print_row(result)
+
+            # 超过时间预算后跳过该配置下更大的 N
+            skipped = elapsed > budget
+    return results
+
+
+def print_header():
+    print(f"{'N':>3} {'引擎':<10} {'模式':<9} {'耗时(s)':>10} {'总解数':>10} {'独立解数':>9} 校验")
+
+
+def print_row(result):
+    if result.get("skipped"):
+        print(f"{result['n']:>3} {result['engine']:<10} {result['mode']:<9} {'跳过':>10}")
+        return
+    print(f"{result['n']:>3} {result['engine']:<10} {result['mode']:<9} {result['seconds']:>10.4f} "
+          f"{result['total']:>10} {result['distinct']:>9} {'通过' if result['ok'] else '错误'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N 皇后求解器基准测试")
+    parser.add_argument("--min", type=int, default=4, dest="n_min")
+    parser.add_argument("--max", type=int, default=14, dest="n_max")
+    parser.add_argument("--engines", nargs="+", default=list(NQueensSolver.ENGINES), choices=NQueensSolver.ENGINES)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--budget", type=float, default=10.0, help="单次运行超过该秒数后跳过更大的 N")
+    parser.add_argument("--stats", action="store_true", help="为 solve 模式附加一次带统计的运行")
+    parser.add_argument("--json", default="benchmark_results.json", help="结果输出文件")
+    args = parser.parse_args()
+
+    if not 1 <= args.n_min <= args.n_max <= len(KNOWN_TOTALS):
+        parser.error(f"N 的范围必须在 1 到 {len(KNOWN_TOTALS)} 之间")
+
+    print_header()
+    results = benchmark(args.n_min, args.n_max, args.engines, args.modes, args.budget, args.stats)
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": sys.version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.json}")
+
+    failures = [r for r in results if not r.get("skipped") and not r["ok"]]
+    if failures:
+        print(f"有 {len(failures)} 项结果与 OEIS 不符")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,445 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import os
+import mmap
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".nqueens_cache")
 
-class NQueensSolver:
+
+# 求解统计：每层访问的节点数、每层因冲突被剪掉的候选列数、
+# _is_safe 调用次数、去重时生成的变换数，以及搜索和去重各自的耗时
+class SolverStats:
     def __init__(self, n):
+        self.nodes = [0] * (n + 1)
+        self.prunes = [0] * max(n, 1)
+        self.safety_checks = 0
+        self.variants = 0
+        self.search_time = 0.0
+        self.dedup_time = 0.0
+
+    # weight 用于并行搜索中按镜像对称省去的子树：该子树的计数与搜索过的那一半完全相同
+    def merge(self, other, weight=1):
+        self.nodes = [a + weight * b for a, b in zip(self.nodes, other.nodes)]
+        self.prunes = [a + weight * b for a, b in zip(self.prunes, other.prunes)]
+        self.safety_checks += weight * other.safety_checks
+        self.variants += weight * other.variants
+
+    def as_dict(self):
+        return {
+            "nodes": sum(self.nodes),
+            "nodes_per_depth": self.nodes,
+            "prunes_per_depth": self.prunes,
+            "safety_checks": self.safety_checks,
+            "variants": self.variants,
+            "search_time": self.search_time,
+            "dedup_time": self.dedup_time,
+        }
+
+
+class NQueensSolver:
+    ENGINES = ("bitmask", "backtrack")
+    METHODS = ("construct", "min_conflicts")
+    GREEDY_TRIES = 8
+    SWAP_TRIES = 64
+    PROGRESS_MASK = 0xFFF  # 每搜索 4096 个节点发布一次进度并检查取消请求
+
+    def __init__(self, n, engine="bitmask", workers=1, instrument=False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"未知的求解引擎: {engine}")
         self.n = n
+        self.engine = engine
+        self.workers = workers  # None 表示使用全部 CPU 核心
+        self.stats = None
+        if instrument:
+            # 用带计数的版本覆盖实例上的方法，关闭统计时热路径上没有任何额外开销
+            self.stats = SolverStats(n)
+            self._backtrack = self._backtrack_instrumented
+            self._bitmask_search = self._bitmask_search_instrumented
+            self._is_safe = self._is_safe_instrumented
+            self._generate_variants = self._generate_variants_instrumented
         self.solutions = []
         self.unique_solutions = []
         self.board = [-1] * n
+        self.full_mask = (1 << n) - 1
+        self.nodes_explored = 0
+        self.branches_done = 0
+        self.branches_total = 0
+        self.cancelled = False
 
     def solve(self):
-        self._backtrack(0)
+        started = time.perf_counter()
+        if self.workers == 1:
+            self._search_from(())
+        else:
+            self._parallel_search()
+        searched = time.perf_counter()
         self._find_unique_solutions()
+        if self.stats is not None:
+            self.stats.search_time += searched - started
+            self.stats.dedup_time += time.perf_counter() - searched
         return self.solutions, self.unique_solutions
 
+    # 惰性生成解：按与 solve() 相同的顺序逐个产出，不保存已产出的棋盘。
+    # 搜索过程中 nodes_explored / branches_done 记录进度，可由其他线程读取，
+    # 调用 cancel() 后生成器会尽快结束
+    def iter_solutions(self, unique=False):
+        if unique and self.engine == "bitmask":
+            for board, _ in self._iter_canonical():
+                yield board.copy()
+            return
+
+        if self.engine == "bitmask":
+            search = self._iter_bitmask()
+        else:
+            self.nodes_explored = 0
+            self.branches_total = self.n
+            search = self._iter_backtrack(0)
+        for board in search:
+            if not unique or self._symmetry_weight(board):
+                yield board
+        if not self.cancelled:
+            self.branches_done = self.branches_total
+
+    def cancel(self):
+        self.cancelled = True
+
+    # 只求一个解，用于回溯无法处理的超大 N；N 为 2 或 3 时无解，返回 None
+    def find_one(self, method="construct", seed=None):
+        if method not in self.METHODS:
+            raise ValueError(f"未知的求解方法: {method}")
+        if self.n in (2, 3):
+            return None
+        if method == "construct":
+            return self._construct()
+        return self._min_conflicts(random.Random(seed))
+
+    def is_valid_solution(self, board):
+        return (len(board) == self.n and
+                len(set(board)) == self.n and
+                len({row + col for row, col in enumerate(board)}) == self.n and
+                len({row - col for row, col in enumerate(board)}) == self.n)
+
+    # 显式构造：先放所有偶数列再放所有奇数列（列号从 1 开始），
+    # N mod 6 为 2 或 3 时按已知规则调整两个列表的顺序
+    def _construct(self):
+        n = self.n
+        evens = list(range(2, n + 1, 2))
+        odds = list(range(1, n + 1, 2))
+        if n % 6 == 2:
+            odds = [3, 1] + odds[3:] + [5]
+        elif n % 6 == 3:
+            evens = evens[1:] + [2]
+            odds = odds[2:] + [1, 3]
+        return [col - 1 for col in evens + odds]
+
+    # 最小冲突局部搜索：棋盘始终是一个排列（列不冲突），两个方向的对角线
+    # 各用一个计数数组记录皇后数。先逐行贪心地挑选不冲突的列，
+    # 再对仍有冲突的行随机尝试与其他行交换列，只接受使冲突对数减少的交换。
+    # 每轮只复查上一轮的冲突行和发生过交换的行，复查不到冲突或没有可接受的交换时
+    # 再全盘检查一次；全盘检查的一轮也没有可接受的交换时换一个随机初始局面重来。
+    # N 很大时一轮要处理上百万行，贪心放置和处理冲突行时每 4096 行检查一次取消请求
+    def _min_conflicts(self, rng):
+        n = self.n
+        offset = n - 1
+        uniform = rng.random
+        while not self.cancelled:
+            board = list(range(n))
+            diag_sum = [0] * (2 * n - 1)
+            diag_diff = [0] * (2 * n - 1)
+            for row in range(n):
+                if not row & self.PROGRESS_MASK and self.cancelled:
+                    return None
+                for _ in range(self.GREEDY_TRIES):
+                    j = row + int(uniform() * (n - row))
+                    col = board[j]
+                    if not diag_sum[row + col] and not diag_diff[row - col + offset]:
+                        break
+                board[row], board[j] = board[j], board[row]
+                diag_sum[row + col] += 1
+                diag_diff[row - col + offset] += 1
+
+            candidates = None
+            while not self.cancelled:
+                rows = candidates or range(n)
+                step = self.PROGRESS_MASK + 1
+                conflicted = []
+                for start in range(0, len(rows), step):
+                    if self.cancelled:
+                        return None
+                    conflicted += [row for row in rows[start:start + step]
+                                   if diag_sum[row + board[row]] > 1 or diag_diff[row - board[row] + offset] > 1]
+                if not conflicted:
+                    if candidates is None:
+                        return board
+                    candidates = None
+                    continue
+
+                swapped = []
+                for count, i in enumerate(conflicted):
+                    if not count & self.PROGRESS_MASK and self.cancelled:
+                        return None
+                    ci = board[i]
+                    if diag_sum[i + ci] == 1 and diag_diff[i - ci + offset] == 1:
+                        continue
+                    for _ in range(min(n, self.SWAP_TRIES)):
+                        j = int(uniform() * n)
+                        cj = board[j]
+                        if i == j:
+                            continue
+                        diag_sum[i + ci] -= 1
+                        diag_diff[i - ci + offset] -= 1
+                        removed = diag_sum[i + ci] + diag_diff[i - ci + offset]
+                        diag_sum[j + cj] -= 1
+                        diag_diff[j - cj + offset] -= 1
+                        removed += diag_sum[j + cj] + diag_diff[j - cj + offset]
+                        added = diag_sum[i + cj] + diag_diff[i - cj + offset]
+                        diag_sum[i + cj] += 1
+                        diag_diff[i - cj + offset] += 1
+                        added += diag_sum[j + ci] + diag_diff[j - ci + offset]
+                        diag_sum[j + ci] += 1
+                        diag_diff[j - ci + offset] += 1
+                        if added < removed:
+                            board[i], board[j] = cj, ci
+                            swapped.append(j)
+                            break
+
+                        diag_sum[i + cj] -= 1
+                        diag_diff[i - cj + offset] -= 1
+                        diag_sum[j + ci] -= 1
+                        diag_diff[j - ci + offset] -= 1
+                        diag_sum[i + ci] += 1
+                        diag_diff[i - ci + offset] += 1
+                        diag_sum[j + cj] += 1
+                        diag_diff[j - cj + offset] += 1
+
+                if swapped:
+                    candidates = conflicted + swapped
+                elif candidates is None:
+                    break
+                else:
+                    candidates = None
+        return None
+
+    def _iter_bitmask(self):
+        n = self.n
+        self.nodes_explored = 0
+        self.branches_total = n
+        if n == 0:
+            return
+        nodes = 0
+        board = [-1] * n
+        cols = [0] * n
+        diag_left = [0] * n
+        diag_right = [0] * n
+        free = [0] * n
+        free[0] = self.full_mask
+        row = 0
+        while row >= 0:
+            if not free[row]:
+                row -= 1
+                continue
+            bit = free[row] & -free[row]
+            free[row] ^= bit
+            board[row] = bit.bit_length() - 1
+            nodes += 1
+            if not nodes & self.PROGRESS_MASK:
+                self.nodes_explored = nodes
+                if self.cancelled:
+                    return
+            if row == 0:
+                self.branches_done = n - bin(free[0]).count("1") - 1
+            if row == n - 1:
+                yield board.copy()
+                continue
+
+            row += 1
+            cols[row] = cols[row - 1] | bit
+            diag_left[row] = ((diag_left[row - 1] | bit) << 1) & self.full_mask
+            diag_right[row] = (diag_right[row - 1] | bit) >> 1
+            free[row] = self.full_mask & ~(cols[row] | diag_left[row] | diag_right[row])
+        self.nodes_explored = nodes
+
+    def _iter_backtrack(self, row):
+        if row == self.n:
+            yield self.board.copy()
+            return
+
+        for col in range(self.n):
+            if self.cancelled:
+                return
+            if self._is_safe(row, col):
+                self.board[row] = col
+                self.nodes_explored += 1
+                if row == 0:
+                    self.branches_done = col
+                yield from self._iter_backtrack(row + 1)
+
+    # 只计数不保存棋盘：只枚举每个对称类中字典序最小的解，
+    # 按其旋转对称性（90°/180°/无）分别计 2/4/8 个解
+    def count(self):
+        self.total_count = 0
+        self.distinct_count = 0
+        if self.n == 1:
+            self.total_count = self.distinct_count = 1
+            return self.total_count, self.distinct_count
+
+        for _, weight in self._iter_canonical():
+            self.total_count += weight
+            self.distinct_count += 1
+        return self.total_count, self.distinct_count
+
+    # 搜索时剪掉非代表解。设第一行皇后在第 d 列，代表解要求其余三条边上的皇后
+    # 离角的距离都不小于 d：第 0 列和第 n-1 列只能放在第 d..n-1-d 行，
+    # 最后一行只能放在第 d..n-1-d 列。d == 0（角上有皇后）时只有主对角线翻转
+    # 可能与之冲突，要求第 1 列的皇后行号大于 board[1]，满足后必为代表解且无旋转对称。
+    # 其余情况在叶子处用 _symmetry_weight 做最终判断
+    def _iter_canonical(self):
+        n = self.n
+        self.nodes_explored = 0
+        self.branches_total = (n + 1) // 2
+        if n == 0:
+            return
+        nodes = 0
+        edges = 1 | (1 << (n - 1))
+        board = self.board
+        cols = [0] * n
+        diag_left = [0] * n
+        diag_right = [0] * n
+        blocked = [0] * n
+        free = [0] * n
+        free[0] = (1 << ((n + 1) // 2)) - 1
+        row = 0
+        while row >= 0:
+            if not free[row]:
+                row -= 1
+                continue
+            bit = free[row] & -free[row]
+            free[row] ^= bit
+            board[row] = bit.bit_length() - 1
+            nodes += 1
+            if not nodes & self.PROGRESS_MASK:
+                self.nodes_explored = nodes
+                if self.cancelled:
+                    return
+            if row == n - 1:
+                if board[0] == 0:
+                    yield board, 8
+                else:
+                    weight = self._symmetry_weight(board)
+                    if weight:
+                        yield board, weight
+                continue
+
+            if row == 0:
+                self.branches_done = self.branches_total - bin(free[0]).count("1") - 1
+                d = board[0]
+                for r in range(1, n):
+                    blocked[r] = edges if r < d or r > n - 1 - d else 0
+                if d:
+                    blocked[n - 1] |= self.full_mask & ~(((1 << (n - 2 * d)) - 1) << d)
+            elif row == 1 and board[0] == 0:
+                for r in range(2, n):
+                    blocked[r] = 2 if r < board[1] else 0
+
+            row += 1
+            cols[row] = cols[row - 1] | bit
+            diag_left[row] = ((diag_left[row - 1] | bit) << 1) & self.full_mask
+            diag_right[row] = (diag_right[row - 1] | bit) >> 1
+            free[row] = self.full_mask & ~(cols[row] | diag_left[row] | diag_right[row] | blocked[row])
+        self.nodes_explored = nodes
+
+    def _symmetry_weight(self, board):
+        rot90 = self._rotate_90(board)
+        rot180 = self._rotate_90(rot90)
+        rot270 = self._rotate_90(rot180)
+        for variant in (rot90, rot180, rot270,
+                        self._reflect_horizontal(board), self._reflect_vertical(board),
+                        self._reflect_diagonal(board), self._reflect_anti_diagonal(board)):
+            if variant < board:
+                return 0
+
+        if rot90 == board:
+            return 2
+        if rot180 == board:
+            return 4
+        return 8
+
+    def _search_from(self, prefix):
+        cols = diag_left = diag_right = 0
+        for row, col in enumerate(prefix):
+            # 前缀各行在串行搜索里由上层节点检查，不计入统计
+            if not NQueensSolver._is_safe(self, row, col):
+                return
+            self.board[row] = col
+            bit = 1 << col
+            cols |= bit
+            diag_left = ((diag_left | bit) << 1) & self.full_mask
+            diag_right = (diag_right | bit) >> 1
+
+        if self.engine == "bitmask":
+            self._bitmask_search(len(prefix), cols, diag_left, diag_right)
+        else:
+            self._backtrack(len(prefix))
+
+    # 按前两行的列号拆分搜索树；利用左右镜像对称，第一行只搜索左半边（含中列），
+    # 右半边的解由镜像得到，并按串行搜索的顺序合并。统计时镜像的一半按相同的计数加倍，
+    # 再补上在主进程里展开的前缀各行，结果与串行搜索一致
+    def _parallel_search(self):
+        half = (self.n + 1) // 2
+        prefixes = [(c,) for c in range(half)]
+        if self.n >= 2:
+            prefixes = [(c0, c1) for c0 in range(half) for c1 in range(self.n) if abs(c1 - c0) > 1]
+
+        tasks = [(self.n, self.engine, prefix, self.stats is not None) for prefix in prefixes]
+        by_first_col = [[] for _ in range(self.n)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for prefix, (solutions, stats) in zip(prefixes, pool.map(_search_prefix_task, tasks)):
+                by_first_col[prefix[0]].extend(solutions)
+                if stats is not None:
+                    self.stats.merge(stats, 1 if 2 * prefix[0] + 1 == self.n else 2)
+        if self.stats is not None and self.n:
+            self._count_prefix_rows(min(self.n, 2))
+
+        for col in range(self.n):
+            if col < half:
+                self.solutions.extend(by_first_col[col])
+            else:
+                mirrored = by_first_col[self.n - 1 - col]
+                self.solutions.extend(self._reflect_horizontal(b) for b in reversed(mirrored))
+
+    # 前缀各行的节点：第 0 行一个节点，不剪枝；第 1 行 n 个节点，第一行的列及其两侧被剪掉。
+    # 回溯引擎在每个节点对每一列各做一次安全检查
+    def _count_prefix_rows(self, depth):
+        n = self.n
+        self.stats.nodes[0] += 1
+        if depth == 2:
+            self.stats.nodes[1] += n
+            self.stats.prunes[1] += 3 * n - 2
+        if self.engine == "backtrack":
+            self.stats.safety_checks += n * (1 + (n if depth == 2 else 0))
+
+    # 位运算回溯：第 c 列对应第 c 位，两条对角线随行号左右移位，
+    # 每次取最低位的空位，因此列的枚举顺序与 _backtrack 一致
+    def _bitmask_search(self, row, cols, diag_left, diag_right):
+        if row == self.n:
+            self.solutions.append(self.board.copy())
+            return
+
+        free = self.full_mask & ~(cols | diag_left | diag_right)
+        while free:
+            bit = free & -free
+            free ^= bit
+            self.board[row] = bit.bit_length() - 1
+            self._bitmask_search(row + 1, cols | bit,
+                                 ((diag_left | bit) << 1) & self.full_mask,
+                                 (diag_right | bit) >> 1)
+
     def _backtrack(self, row):
         if row == self.n:
             self.solutions.append(self.board.copy())
@@ -32,6 +458,44 @@ class NQueensSolver:
                 return False
         return True
 
+    def _bitmask_search_instrumented(self, row, cols, diag_left, diag_right):
+        self.stats.nodes[row] += 1
+        if row == self.n:
+            self.solutions.append(self.board.copy())
+            return
+
+        free = self.full_mask & ~(cols | diag_left | diag_right)
+        self.stats.prunes[row] += self.n - bin(free).count("1")
+        while free:
+            bit = free & -free
+            free ^= bit
+            self.board[row] = bit.bit_length() - 1
+            self._bitmask_search(row + 1, cols | bit,
+                                 ((diag_left | bit) << 1) & self.full_mask,
+                                 (diag_right | bit) >> 1)
+
+    def _backtrack_instrumented(self, row):
+        self.stats.nodes[row] += 1
+        if row == self.n:
+            self.solutions.append(self.board.copy())
+            return
+
+        for col in range(self.n):
+            if self._is_safe(row, col):
+                self.board[row] = col
+                self._backtrack(row + 1)
+            else:
+                self.stats.prunes[row] += 1
+
+    def _is_safe_instrumented(self, row, col):
+        self.stats.safety_checks += 1
+        return NQueensSolver._is_safe(self, row, col)
+
+    def _generate_variants_instrumented(self, board):
+        variants = NQueensSolver._generate_variants(self, board)
+        self.stats.variants += len(variants)
+        return variants
+
     def _find_unique_solutions(self):
         unique_boards = set()
 
@@ -82,10 +546,229 @@ class NQueensSolver:
         return new_board
 
     def _reflect_anti_diagonal(self, board):
-        return self._reflect_diagonal(self._reflect_horizontal(board))
+        return self._reflect_diagonal(self._reflect_horizontal(self._reflect_vertical(board)))
+
+
+def _search_prefix_task(args):
+    n, engine, prefix, instrument = args
+    solver = NQueensSolver(n, engine, instrument=instrument)
+    solver._search_from(prefix)
+    return solver.solutions, solver.stats
+
+
+# 磁盘缓存文件：每个解占 n 个连续的列号（n ≤ 256 时为 uint8，否则为 uint16），
+# 通过内存映射按下标随机读取，不需要整体载入
+class PackedSolutions:
+    def __init__(self, path, n):
+        self.path = path
+        self.n = n
+        self.typecode = "B" if n <= 256 else "H"
+        self.file = open(path, "rb")
+        self.map = None
+        size = os.path.getsize(path)
+        if size:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.map).cast(self.typecode)
+        else:
+            self.view = memoryview(array(self.typecode)).cast(self.typecode)
+        self.length = len(self.view) // n if n else 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("解的下标超出范围")
+        return self.view[index * self.n:(index + 1) * self.n].tolist()
+
+    def close(self):
+        self.view.release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+# 写入的大小超过缓存的 disk_limit 后不再写入新的解，只继续计数：
+# 已写入的部分仍可浏览，但这次的结果不会提交到缓存
+class PackedSolutionWriter:
+    def __init__(self, cache, n, mode):
+        self.cache = cache
+        self.n = n
+        self.mode = mode
+        self.typecode = "B" if n <= 256 else "H"
+        self.path = cache.path(n, mode)
+        self.temp_path = self.path + ".tmp"
+        self.file = open(self.temp_path, "wb")
+        self.reader = None
+        self.board_size = n * array(self.typecode).itemsize
+        self.count = 0
+        self.stored = 0
+        self.flushed = 0
+        self.overflowed = False
+
+    def append(self, board):
+        self.count += 1
+        if self.overflowed:
+            return
+        if (self.stored + 1) * self.board_size > self.cache.disk_limit:
+            self.overflowed = True
+            return
+        array(self.typecode, board).tofile(self.file)
+        self.stored += 1
+
+    # 可以在写入线程之外调用：先记下数量再刷新，保证前 flushed 个解已落盘
+    def flush(self):
+        stored = self.stored
+        self.file.flush()
+        self.flushed = stored
+
+    def read(self, index):
+        if not 0 <= index < self.flushed:
+            raise IndexError("解的下标超出范围")
+        if self.reader is None:
+            self.reader = open(self.temp_path, "rb")
+        board = array(self.typecode)
+        self.reader.seek(index * self.n * board.itemsize)
+        board.fromfile(self.reader, self.n)
+        return board.tolist()
+
+    def close(self):
+        self.file.close()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def commit(self):
+        if self.overflowed:
+            self.discard()
+            return None
+        self.close()
+        os.replace(self.temp_path, self.path)
+        self.cache.evict_disk(keep=self.path)
+        return self.cache.get(self.n, self.mode)
+
+    def discard(self):
+        self.close()
+        os.remove(self.temp_path)
+
+
+# 两级 LRU 缓存：内存中保留最近打开的若干个映射，磁盘上按最近访问时间淘汰，
+# 总大小不超过 disk_limit 字节
+class SolutionCache:
+    def __init__(self, directory=CACHE_DIR, memory_entries=4, disk_limit=256 * 1024 * 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_limit = disk_limit
+        self.memory = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, n, mode):
+        return os.path.join(self.directory, f"n{n}_{mode}.bin")
+
+    def get(self, n, mode):
+        key = (n, mode)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        path = self.path(n, mode)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        solutions = PackedSolutions(path, n)
+        self.memory[key] = solutions
+        while len(self.memory) > self.memory_entries:
+            _, oldest = self.memory.popitem(last=False)
+            oldest.close()
+        return solutions
+
+    def put(self, n, mode, solutions):
+        writer = self.writer(n, mode)
+        for board in solutions:
+            writer.append(board)
+        return writer.commit()
+
+    def writer(self, n, mode):
+        return PackedSolutionWriter(self, n, mode)
+
+    def evict_disk(self, keep=None):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_limit:
+                break
+            if path == keep:
+                continue
+            for key, solutions in list(self.memory.items()):
+                if solutions.path == path:
+                    del self.memory[key]
+                    solutions.close()
+            os.remove(path)
+            total -= size
+
+
+# 后台求解线程：把找到的解依次写入缓存文件，界面线程通过 writer.flushed
+# 和 solver 上的进度计数轮询结果
+class SolveJob(threading.Thread):
+    def __init__(self, solver, unique, writer):
+        super().__init__(daemon=True)
+        self.solver = solver
+        self.unique = unique
+        self.writer = writer
+        self.error = None
+
+    def run(self):
+        try:
+            for board in self.solver.iter_solutions(unique=self.unique):
+                self.writer.append(board)
+            self.writer.flush()
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        self.solver.cancel()
+
+    def progress_text(self):
+        solver = self.solver
+        share = solver.branches_done / solver.branches_total if solver.branches_total else 0
+        return (f"已搜索节点: {solver.nodes_explored:,}  已找到: {self.writer.count}  "
+                f"第一行分支: {solver.branches_done}/{solver.branches_total} ({share:.0%})")
+
+
+class FindOneJob(threading.Thread):
+    def __init__(self, solver, method):
+        super().__init__(daemon=True)
+        self.solver = solver
+        self.method = method
+        self.board = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.board = self.solver.find_one(self.method)
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        self.solver.cancel()
 
 
 class NQueensGUI:
+    POLL_INTERVAL = 100
+    RESIZE_DELAY = 50
+    RASTER_THRESHOLD = 40  # 超过该规模时棋盘格用一张缓存的图片绘制
+    MIN_CELL_SIZE = 4  # 格子小于该尺寸时改为缩略图 + 局部放大显示
+    ZOOM_CELLS = 16
+    METHOD_NAMES = {"构造法": "construct", "最小冲突": "min_conflicts"}
+
     def __init__(self, root):
         self.root = root
         self.root.title("N 皇后问题-黄斌-2024120483")
@@ -93,8 +776,29 @@ class NQueensGUI:
 
         self.font_family = "SimHei"
 
+        self.cache = SolutionCache()
+        self.solution_mode = "all"
+        self.cached_solutions = None
+        self.cache_writer = None
+        self.job = None
+
         self.current_solution_index = 0
-        self.current_solutions = []
+        self.solutions_found = 0
+        self.search_done = False
+
+        # 棋盘上的图形对象在 N 或尺寸不变时保留，切换解法时只移动皇后
+        self.square_items = []
+        self.label_items = []
+        self.queen_items = []
+        self.board_geometry = None
+        self.drawn_solution = None
+        self.raster_base = None
+        self.raster_cache = {}
+        self.resize_after_id = None
+        self.minimap_source = None
+        self.minimap_size = 0
+        self.minimap_image = None
+        self.zoom_origin = (0, 0)
 
         self.main_frame = ttk.Frame(root, padding="10")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -116,6 +820,16 @@ class NQueensGUI:
         ttk.Radiobutton(self.input_frame, text="所有解法", variable=self.solution_type, value="all", style="TRadiobutton").grid(row=0, column=3, padx=5, pady=5)
         ttk.Radiobutton(self.input_frame, text="独立解法", variable=self.solution_type, value="unique", style="TRadiobutton").grid(row=0, column=4, padx=5, pady=5)
 
+        self.cancel_button = ttk.Button(self.input_frame, text="取消", command=self.cancel_solve, width=10, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=5, padx=5, pady=5)
+
+        ttk.Label(self.input_frame, text="单个解:", font=(self.font_family, 10)).grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        self.method_var = tk.StringVar(value="构造法")
+        ttk.Combobox(self.input_frame, textvariable=self.method_var, values=list(self.METHOD_NAMES),
+                     state="readonly", width=8).grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+        self.find_one_button = ttk.Button(self.input_frame, text="求一个解", command=self.find_one_solution, width=10)
+        self.find_one_button.grid(row=1, column=2, padx=5, pady=5)
+
         self.info_frame = ttk.LabelFrame(self.main_frame, text="结果信息", padding="10")
         self.info_frame.pack(fill=tk.X, pady=5)
 
@@ -125,6 +839,9 @@ class NQueensGUI:
         self.current_label = ttk.Label(self.info_frame, text="当前解法: 0/0", font=(self.font_family, 10))
         self.current_label.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
 
+        self.progress_label = ttk.Label(self.info_frame, text="", font=(self.font_family, 10))
+        self.progress_label.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
+
         self.board_frame = ttk.LabelFrame(self.main_frame, text="棋盘", padding="10")
         self.board_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
@@ -143,7 +860,8 @@ class NQueensGUI:
         self.status_bar = ttk.Label(root, text="准备就绪", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-        self.root.bind("<Configure>", self.resize_board)
+        self.canvas.bind("<Configure>", self.resize_board)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def solve_n_queens(self):
         try:
@@ -152,108 +870,386 @@ class NQueensGUI:
                 messagebox.showerror("错误", "N 必须至少为 4")
                 return
 
-            self.status_bar.config(text=f"正在求解 {n}x{n} 皇后问题...")
-            self.root.update()
+            self.stop_job()
+            self.solution_mode = self.solution_type.get()
+            self.current_solution_index = 0
+            self.zoom_origin = (0, 0)
+            self.progress_label.config(text="")
 
-            solver = NQueensSolver(n)
-            all_solutions, unique_solutions = solver.solve()
+            # 相同的 N 和模式直接从缓存读取；否则在后台线程中边搜索边写入缓存，搜索完成后生效
+            self.cached_solutions = self.cache.get(n, self.solution_mode)
+            if self.cached_solutions is not None:
+                self.solutions_found = len(self.cached_solutions)
+                self.search_done = True
+                self.show_results()
+                return
 
-            if self.solution_type.get() == "all":
-                self.current_solutions = all_solutions
-                total_text = f"总解法数: {len(all_solutions)}"
-            else:
-                self.current_solutions = unique_solutions
-                total_text = f"独立解法数: {len(unique_solutions)}"
+            self.solutions_found = 0
+            self.search_done = False
+            self.cache_writer = self.cache.writer(n, self.solution_mode)
+            self.job = SolveJob(NQueensSolver(n), self.solution_mode == "unique", self.cache_writer)
+            self.job.start()
+            self.cancel_button.config(state=tk.NORMAL)
+            self.clear_board()
+            self.update_navigation()
+            self.root.after(self.POLL_INTERVAL, self.poll_job, self.job)
+        except Exception as e:
+            messagebox.showerror("错误", f"求解过程中出错: {str(e)}")
+            self.status_bar.config(text="求解失败")
+
+    # 超大 N 只求一个解：构造法或最小冲突局部搜索，同样在后台线程中运行
+    def find_one_solution(self):
+        try:
+            n = self.n_var.get()
+            if n < 4:
+                messagebox.showerror("错误", "N 必须至少为 4")
+                return
 
-            self.total_label.config(text=total_text)
+            self.stop_job()
+            self.solution_mode = "one"
+            self.current_solution_index = 0
+            self.cached_solutions = None
+            self.solutions_found = 0
+            self.search_done = False
+            self.zoom_origin = (0, 0)
+            self.progress_label.config(text=f"正在使用{self.method_var.get()}求解 {n}x{n} 皇后问题...")
 
-            if len(self.current_solutions) > 0:
-                self.current_solution_index = 0
-                self.current_label.config(text=f"当前解法: {self.current_solution_index + 1}/{len(self.current_solutions)}")
-                self.prev_button.config(state=tk.DISABLED if len(self.current_solutions) == 1 else tk.NORMAL)
-                self.next_button.config(state=tk.DISABLED if len(self.current_solutions) == 1 else tk.NORMAL)
-                self.draw_board()
-                self.status_bar.config(text=f"求解完成，共找到 {len(self.current_solutions)} 种解法")
-            else:
-                self.canvas.delete("all")
-                self.status_bar.config(text="未找到解法")
+            self.job = FindOneJob(NQueensSolver(n), self.METHOD_NAMES[self.method_var.get()])
+            self.job.start()
+            self.cancel_button.config(state=tk.NORMAL)
+            self.clear_board()
+            self.update_navigation()
+            self.root.after(self.POLL_INTERVAL, self.poll_find_one, self.job)
         except Exception as e:
             messagebox.showerror("错误", f"求解过程中出错: {str(e)}")
             self.status_bar.config(text="求解失败")
 
-    def draw_board(self):
-        self.canvas.delete("all")
+    def poll_find_one(self, job):
+        if job is not self.job:
+            return
+        if job.is_alive():
+            self.root.after(self.POLL_INTERVAL, self.poll_find_one, job)
+            return
+
+        self.job = None
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_label.config(text="")
+        if job.error is not None:
+            messagebox.showerror("错误", f"求解过程中出错: {str(job.error)}")
+            self.status_bar.config(text="求解失败")
+        elif job.board is None:
+            self.update_navigation()
+        else:
+            self.cached_solutions = [job.board]
+            self.solutions_found = 1
+            self.search_done = True
+            self.show_results()
+
+    def poll_job(self, job):
+        if job is not self.job:
+            return
+
+        finished = not job.is_alive()
+        had_solutions = self.solutions_found > 0
+        self.cache_writer.flush()
+        self.solutions_found = self.cache_writer.flushed
+        self.progress_label.config(text=job.progress_text())
+
+        if not finished:
+            self.update_navigation()
+            if not had_solutions and self.solutions_found:
+                self.draw_board()
+            self.root.after(self.POLL_INTERVAL, self.poll_job, job)
+            return
+
+        self.job = None
+        self.cancel_button.config(state=tk.DISABLED)
+        if job.error is not None:
+            self.discard_partial()
+            messagebox.showerror("错误", f"求解过程中出错: {str(job.error)}")
+            self.status_bar.config(text="求解失败")
+        elif job.solver.cancelled:
+            # 保留已找到的解供浏览，下次求解时丢弃
+            self.update_navigation()
+            if not had_solutions and self.solutions_found:
+                self.draw_board()
+        elif self.cache_writer.overflowed:
+            # 解的数量超过了缓存上限，不写入缓存；已写入的部分保留供浏览，下次求解时丢弃
+            self.search_done = True
+            self.show_results()
+        else:
+            self.cached_solutions = self.cache_writer.commit()
+            self.cache_writer = None
+            self.search_done = True
+            self.show_results()
+
+    def show_results(self):
+        self.update_navigation()
+        if self.solutions_found:
+            self.draw_board()
+        else:
+            self.clear_board()
+            self.status_bar.config(text="未找到解法")
 
-        if not self.current_solutions:
+    def cancel_solve(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_bar.config(text="正在取消...")
+
+    def stop_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job.join()
+            self.job = None
+        self.discard_partial()
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def discard_partial(self):
+        if self.cache_writer is not None:
+            self.cache_writer.discard()
+            self.cache_writer = None
+        self.solutions_found = 0
+
+    def on_close(self):
+        self.stop_job()
+        self.root.destroy()
+
+    def current_board(self):
+        if self.cached_solutions is not None:
+            return self.cached_solutions[self.current_solution_index]
+        return self.cache_writer.read(self.current_solution_index)
+
+    def update_navigation(self):
+        name = {"all": "总解法数", "unique": "独立解法数", "one": "单个解"}[self.solution_mode]
+        # 超过缓存上限后只能浏览已写入的前 solutions_found 个解，总数取写入线程的计数
+        overflowed = self.cache_writer is not None and self.cache_writer.overflowed
+        found = self.cache_writer.count if overflowed else self.solutions_found
+        if self.search_done:
+            total = str(self.solutions_found)
+            self.total_label.config(text=f"{name}: {found}")
+        else:
+            total = "?"
+            self.total_label.config(text=f"{name}: ≥{found}")
+
+        limit_note = f"（超过缓存上限，仅可浏览前 {self.solutions_found} 种）" if overflowed else ""
+        if self.search_done and self.solution_mode == "one":
+            self.status_bar.config(text="已找到一个解")
+        elif self.search_done:
+            self.status_bar.config(text=f"求解完成，共找到 {found} 种解法{limit_note}")
+        elif self.job is not None:
+            self.status_bar.config(text=f"正在后台求解，已找到 {found} 种解法{limit_note}")
+        else:
+            self.status_bar.config(text=f"求解已取消，已找到 {found} 种解法{limit_note}")
+
+        if self.solutions_found == 0:
+            self.current_label.config(text="当前解法: 0/0")
+            self.prev_button.config(state=tk.DISABLED)
+            self.next_button.config(state=tk.DISABLED)
+            return
+
+        self.current_label.config(text=f"当前解法: {self.current_solution_index + 1}/{total}")
+        self.prev_button.config(state=tk.NORMAL if self.current_solution_index > 0 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if self.current_solution_index < self.solutions_found - 1 else tk.DISABLED)
+
+    def draw_board(self):
+        if not self.solutions_found:
+            self.clear_board()
             return
 
-        solution = self.current_solutions[self.current_solution_index]
+        solution = self.current_board()
         n = len(solution)
 
         canvas_width = self.canvas.winfo_width() - 20
         canvas_height = self.canvas.winfo_height() - 20
 
         cell_size = min(canvas_width // n, canvas_height // n)
+        if cell_size < self.MIN_CELL_SIZE:
+            self.draw_minimap(solution)
+            return
 
         x_offset = (self.canvas.winfo_width() - cell_size * n) // 2
         y_offset = (self.canvas.winfo_height() - cell_size * n) // 2
 
-        for row in range(n):
-            for col in range(n):
-                x1 = x_offset + col * cell_size
-                y1 = y_offset + row * cell_size
-                x2 = x1 + cell_size
-                y2 = y1 + cell_size
-
-                color = "#FFFFFF" if (row + col) % 2 == 0 else "#C0C0C0"
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="black")
-
-                if solution[row] == col:
-                    center_x = (x1 + x2) // 2
-                    center_y = (y1 + y2) // 2
-                    radius = cell_size // 2 - 5
-
-                    self.canvas.create_oval(
-                        center_x - radius, center_y - radius,
-                        center_x + radius, center_y + radius,
-                        fill="red", outline="black", width=2
-                    )
-
-        for i in range(n):
-            self.canvas.create_text(
-                x_offset + i * cell_size + cell_size // 2,
-                y_offset - 15,
-                text=str(i),
-                font=(self.font_family, 10, "bold")
-            )
+        if self.board_geometry != (n, cell_size, x_offset, y_offset):
+            self.layout_board(n, cell_size, x_offset, y_offset)
+        self.place_queens(solution)
+
+    def clear_board(self):
+        self.canvas.delete("all")
+        self.square_items = []
+        self.label_items = []
+        self.queen_items = []
+        self.board_geometry = None
+        self.drawn_solution = None
+
+    def layout_board(self, n, cell_size, x_offset, y_offset):
+        raster = n > self.RASTER_THRESHOLD
+        if self.board_geometry is None or self.board_geometry[0] != n:
+            self.clear_board()
+            if raster:
+                self.square_items = [self.canvas.create_image(0, 0, anchor=tk.NW)]
+            else:
+                self.square_items = [
+                    self.canvas.create_rectangle(0, 0, 0, 0, fill="#FFFFFF" if (row + col) % 2 == 0 else "#C0C0C0", outline="black")
+                    for row in range(n) for col in range(n)
+                ]
+            self.label_items = [
+                (self.canvas.create_text(0, 0, text=str(i), font=(self.font_family, 10, "bold")),
+                 self.canvas.create_text(0, 0, text=str(i), font=(self.font_family, 10, "bold")))
+                for i in range(n)
+            ]
+            self.queen_items = [
+                self.canvas.create_oval(0, 0, 0, 0, fill="red", outline="black", width=2)
+                for _ in range(n)
+            ]
 
-            self.canvas.create_text(
-                x_offset - 15,
-                y_offset + i * cell_size + cell_size // 2,
-                text=str(i),
-                font=(self.font_family, 10, "bold")
+        if raster:
+            self.canvas.coords(self.square_items[0], x_offset, y_offset)
+            self.canvas.itemconfig(self.square_items[0], image=self.board_image(n, cell_size))
+        else:
+            for row in range(n):
+                for col in range(n):
+                    x1 = x_offset + col * cell_size
+                    y1 = y_offset + row * cell_size
+                    self.canvas.coords(self.square_items[row * n + col], x1, y1, x1 + cell_size, y1 + cell_size)
+
+        for i, (top_label, left_label) in enumerate(self.label_items):
+            self.canvas.coords(top_label, x_offset + i * cell_size + cell_size // 2, y_offset - 15)
+            self.canvas.coords(left_label, x_offset - 15, y_offset + i * cell_size + cell_size // 2)
+
+        self.board_geometry = (n, cell_size, x_offset, y_offset)
+        self.drawn_solution = None
+
+    def place_queens(self, solution):
+        _, cell_size, x_offset, y_offset = self.board_geometry
+        radius = max(cell_size // 2 - 5, 1)
+        for row, col in enumerate(solution):
+            if self.drawn_solution is not None and self.drawn_solution[row] == col:
+                continue
+            center_x = x_offset + col * cell_size + cell_size // 2
+            center_y = y_offset + row * cell_size + cell_size // 2
+            self.canvas.coords(
+                self.queen_items[row],
+                center_x - radius, center_y - radius,
+                center_x + radius, center_y + radius
             )
+        self.drawn_solution = solution
+
+    # 左侧为缩略图：每个像素代表若干行列，有皇后的像素标红；
+    # 右侧放大显示缩略图上点选的 ZOOM_CELLS x ZOOM_CELLS 区域
+    def draw_minimap(self, solution):
+        n = len(solution)
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        size = min(width // 2, height) - 40
+        if size < self.ZOOM_CELLS:
+            return
+
+        if self.minimap_source is not solution or self.minimap_size != size:
+            grid = min(n, size)
+            marks = bytearray(grid * grid)
+            for row, col in enumerate(solution):
+                marks[(row * grid // n) * grid + col * grid // n] = 1
+            image = tk.PhotoImage(width=grid, height=grid)
+            image.put(" ".join(
+                "{" + " ".join("#FF0000" if mark else "#FFFFFF" for mark in marks[y * grid:(y + 1) * grid]) + "}"
+                for y in range(grid)
+            ))
+            scale = max(size // grid, 1)
+            self.minimap_image = image.zoom(scale) if scale > 1 else image
+            self.minimap_source = solution
+            self.minimap_size = size
+
+        self.clear_board()
+        pixels = self.minimap_image.width()
+        x_offset = 20
+        y_offset = (height - pixels) // 2
+        minimap = self.canvas.create_image(x_offset, y_offset, image=self.minimap_image, anchor=tk.NW)
+        self.canvas.create_rectangle(x_offset, y_offset, x_offset + pixels, y_offset + pixels, outline="black")
+        self.canvas.create_text(x_offset, y_offset - 15, text="缩略图（点击选择放大区域）",
+                                font=(self.font_family, 10), anchor=tk.W)
+        self.canvas.tag_bind(minimap, "<Button-1>",
+                             lambda event: self.select_zoom(event, solution, x_offset, y_offset, pixels))
+
+        zoom = min(self.ZOOM_CELLS, n)
+        row0, col0 = self.zoom_origin
+        self.canvas.create_rectangle(
+            x_offset + col0 * pixels // n, y_offset + row0 * pixels // n,
+            x_offset + (col0 + zoom) * pixels // n + 1, y_offset + (row0 + zoom) * pixels // n + 1,
+            outline="blue", width=2
+        )
+
+        zoom_x = x_offset + pixels + 40
+        cell_size = min((width - zoom_x - 20) // zoom, (height - 40) // zoom)
+        if cell_size < 1:
+            return
+        zoom_y = (height - cell_size * zoom) // 2
+        self.canvas.create_text(zoom_x, zoom_y - 15, anchor=tk.W, font=(self.font_family, 10),
+                                text=f"第 {row0}-{row0 + zoom - 1} 行，第 {col0}-{col0 + zoom - 1} 列")
+        radius = max(cell_size // 2 - 5, 1)
+        for i in range(zoom):
+            for j in range(zoom):
+                x1 = zoom_x + j * cell_size
+                y1 = zoom_y + i * cell_size
+                color = "#FFFFFF" if (row0 + i + col0 + j) % 2 == 0 else "#C0C0C0"
+                self.canvas.create_rectangle(x1, y1, x1 + cell_size, y1 + cell_size, fill=color, outline="black")
+            col = solution[row0 + i] - col0
+            if 0 <= col < zoom:
+                center_x = zoom_x + col * cell_size + cell_size // 2
+                center_y = zoom_y + i * cell_size + cell_size // 2
+                self.canvas.create_oval(
+                    center_x - radius, center_y - radius,
+                    center_x + radius, center_y + radius,
+                    fill="red", outline="black", width=2
+                )
+
+    # 放大区域以点击处的行为中心，列方向对准该行的皇后，保证区域内至少能看到一个皇后
+    def select_zoom(self, event, solution, x_offset, y_offset, pixels):
+        n = len(solution)
+        zoom = min(self.ZOOM_CELLS, n)
+        row = min(max((event.y - y_offset) * n // pixels, 0), n - 1)
+        row0 = min(max(row - zoom // 2, 0), n - zoom)
+        col0 = min(max(solution[row] - zoom // 2, 0), n - zoom)
+        self.zoom_origin = (row0, col0)
+        self.draw_board()
+
+    # 每个格子一个像素的底图按 N 缓存，放大后的图片按格子大小缓存
+    def board_image(self, n, cell_size):
+        if self.raster_base is None or self.raster_base.width() != n:
+            self.raster_base = tk.PhotoImage(width=n, height=n)
+            rows = []
+            for row in range(n):
+                colors = ("#FFFFFF" if (row + col) % 2 == 0 else "#C0C0C0" for col in range(n))
+                rows.append("{" + " ".join(colors) + "}")
+            self.raster_base.put(" ".join(rows))
+            self.raster_cache = {}
+
+        if cell_size not in self.raster_cache:
+            self.raster_cache = {cell_size: self.raster_base.zoom(cell_size)}
+        return self.raster_cache[cell_size]
 
     def prev_solution(self):
         if self.current_solution_index > 0:
             self.current_solution_index -= 1
-            self.current_label.config(text=f"当前解法: {self.current_solution_index + 1}/{len(self.current_solutions)}")
-            self.next_button.config(state=tk.NORMAL)
-            if self.current_solution_index == 0:
-                self.prev_button.config(state=tk.DISABLED)
+            self.update_navigation()
             self.draw_board()
 
     def next_solution(self):
-        if self.current_solution_index < len(self.current_solutions) - 1:
+        if self.current_solution_index < self.solutions_found - 1:
             self.current_solution_index += 1
-            self.current_label.config(text=f"当前解法: {self.current_solution_index + 1}/{len(self.current_solutions)}")
-            self.prev_button.config(state=tk.NORMAL)
-            if self.current_solution_index == len(self.current_solutions) - 1:
-                self.next_button.config(state=tk.DISABLED)
+            self.update_navigation()
             self.draw_board()
 
+    # 拖动窗口时 <Configure> 会连续触发，只在停止变化 RESIZE_DELAY 毫秒后重绘一次
     def resize_board(self, event=None):
-        if self.current_solutions:
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(self.RESIZE_DELAY, self.redraw_board)
+
+    def redraw_board(self):
+        self.resize_after_id = None
+        if self.solutions_found:
             self.draw_board()
 
 
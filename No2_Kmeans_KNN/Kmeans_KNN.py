@@ -1,17 +1,75 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import pandas as pd
-import matplotlib
-from sklearn.cluster import KMeans
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-matplotlib.rcParams['font.sans-serif'] = ['SimHei']
-matplotlib.rcParams['axes.unicode_minus'] = False
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PARALLEL_MIN_ROWS = 20000  # 数据量较小时进程池的启动和传输开销大于收益，直接串行拟合
+KMEANS_CACHE_SIZE = 8
+POLL_INTERVAL = 100
+
+# pandas、matplotlib 和 sklearn 的导入要一秒多，放到窗口显示之后：界面空闲时由后台线程预先导入，
+# 加载数据或执行计算的入口先调用 import_heavy_modules()，预导入还没完成时在这里等它结束
+Figure = None
+FigureCanvasTkAgg = None
+classification_report = None
+pipeline = None
+_import_lock = threading.Lock()
+
+
+def import_heavy_modules():
+    global Figure, FigureCanvasTkAgg, classification_report, pipeline
+    with _import_lock:
+        if pipeline is not None:
+            return
+        from matplotlib import figure
+        from matplotlib.backends import backend_tkagg
+        from sklearn import metrics
+        import pipeline as module
+        Figure = figure.Figure
+        FigureCanvasTkAgg = backend_tkagg.FigureCanvasTkAgg
+        classification_report = metrics.classification_report
+        pipeline = module
+
+
+# 一次后台计算：若干个 future，以及完成、出错时在界面线程里执行的回调。
+# 取消时撤销尚未开始的 future，并置位 cancel_event 让正在运行的分块计算尽快退出
+class BackgroundJob:
+    def __init__(self, on_done, error_title, on_progress=None):
+        self.on_done = on_done
+        self.error_title = error_title
+        self.on_progress = on_progress
+        self.futures = {}
+        self.cancel_event = threading.Event()
+        self.stats = None
+
+    def submit(self, executor, key, fn, *args, **kwargs):
+        self.futures[key] = executor.submit(fn, *args, **kwargs)
+
+    def cancel(self):
+        self.cancel_event.set()
+        for future in self.futures.values():
+            future.cancel()
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def finished(self):
+        return {key: future.result() for key, future in self.futures.items()
+                if future.done() and not future.cancelled() and future.exception() is None}
+
+    def error(self):
+        for future in self.futures.values():
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                return future.exception()
+        return None
+
+    def result(self, key):
+        return self.futures[key].result()
+
 
 class AIPlatformUI:
     def __init__(self, root):
@@ -19,9 +77,179 @@ class AIPlatformUI:
         self.root.title("2024120483_黄斌_Kmeans&KNN")
         self.df_kmeans = None
         self.df_knn = None
+        self.kmeans_file = None
+        self.kmeans_cache = OrderedDict()
+        self.pool = None
+        # 每个页签一个后台线程：两个页签的计算互不排队，同一页签新的计算会先取消旧的
+        self.threads = {"kmeans": ThreadPoolExecutor(max_workers=1), "knn": ThreadPoolExecutor(max_workers=1)}
+        self.jobs = {"kmeans": None, "knn": None}
+        self.cancel_buttons = {}
+        self.status_labels = {}
+        self.load_stats = {"kmeans": None, "knn": None}
+        self.last_stats = {"kmeans": None, "knn": None}
+        self.knn_model = None
+        self.knn_model_key = None
+        self.elbow_line = None
+        self.elbow_canvas = None
+        self.kmeans_table = None
+        self.knn_canvas = None
+        self.knn_plot_mode = None
+        self.knn_artists = None
         self.build_gui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after_idle(self.prewarm)
+
+    def prewarm(self):
+        threading.Thread(target=import_heavy_modules, daemon=True).start()
+
+    def on_close(self):
+        for tab in self.jobs:
+            self.cancel_job(tab)
+        for executor in self.threads.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def start_job(self, tab, job, text):
+        self.jobs[tab] = job
+        self.cancel_buttons[tab].config(state=tk.NORMAL)
+        self.status_labels[tab].config(text=text)
+        self.poll_job(tab, job)
+
+    # 回调里的异常（例如结果与界面不匹配）同样按计算失败处理：先结束任务，再弹出错误提示
+    def poll_job(self, tab, job):
+        if job is not self.jobs[tab]:
+            return
+        # 先记下是否已完成再刷新进度：刷新时可能提交新的任务，这时要继续轮询
+        finished = job.done()
+        try:
+            if job.on_progress is not None:
+                with pipeline.measure(job.stats, "render"):
+                    job.on_progress(job)
+                    self.flush_drawing(job)
+        except Exception as e:
+            job.cancel()
+            self.end_job(tab)
+            messagebox.showerror(job.error_title, str(e))
+            return
+        if not finished or not job.done():
+            self.root.after(POLL_INTERVAL, self.poll_job, tab, job)
+            return
+
+        self.end_job(tab)
+        error = job.error()
+        if error is not None:
+            messagebox.showerror(job.error_title, str(error))
+            return
+        try:
+            with pipeline.measure(job.stats, "render"):
+                job.on_done(job)
+                self.flush_drawing(job)
+        except Exception as e:
+            messagebox.showerror(job.error_title, str(e))
+            return
+        if job.stats is not None:
+            self.last_stats[tab] = job.stats
+            self.status_labels[tab].config(text=job.stats.summary())
+
+    def end_job(self, tab):
+        self.jobs[tab] = None
+        self.cancel_buttons[tab].config(state=tk.DISABLED)
+        self.status_labels[tab].config(text="")
+
+    # 画布用 draw_idle 推迟绘制；统计耗时时立即处理掉空闲任务，让绘制时间计入 render 阶段
+    def flush_drawing(self, job):
+        if job.stats is not None:
+            self.root.update_idletasks()
+
+    # 开启性能统计时为一次计算建立新的统计，并带上最近一次加载数据的耗时
+    def new_stats(self, tab, with_load=True):
+        if not self.profile_var.get():
+            return None
+        stats = pipeline.PipelineStats()
+        if with_load and self.load_stats[tab] is not None:
+            stats.merge(self.load_stats[tab])
+        return stats
+
+    def load_file(self, tab, file):
+        stats = pipeline.PipelineStats() if self.profile_var.get() else None
+        with pipeline.measure(stats, "load"):
+            df = pipeline.load_dataset(file)
+        self.load_stats[tab] = stats
+        return df
+
+    def export_stats(self, tab):
+        stats = self.last_stats[tab]
+        if stats is None:
+            messagebox.showwarning("没有统计数据", "请先勾选“性能统计”并执行一次计算")
+            return
+        file = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON 文件", "*.json")],
+                                            initialfile=f"{tab}_profile.json")
+        if not file:
+            return
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump({"tab": tab, "time": time.strftime("%Y-%m-%d %H:%M:%S"), **stats.as_dict()},
+                      f, ensure_ascii=False, indent=2)
+
+    # 不等待正在运行的计算结束：它的结果会被丢弃，界面立即可以开始新的计算
+    def cancel_job(self, tab):
+        job = self.jobs[tab]
+        if job is None:
+            return
+        job.cancel()
+        self.jobs[tab] = None
+        self.cancel_buttons[tab].config(state=tk.DISABLED)
+        self.status_labels[tab].config(text="已取消")
+
+    def build_job_controls(self, param_frame, tab, row):
+        self.status_labels[tab] = ttk.Label(param_frame, text="", foreground="gray")
+        self.status_labels[tab].grid(row=row, column=0, columnspan=3, pady=(0, 5))
+        ttk.Checkbutton(param_frame, text="性能统计", variable=self.profile_var).grid(row=row, column=3, pady=(0, 5))
+        ttk.Button(param_frame, text="导出统计", command=lambda: self.export_stats(tab)).grid(
+            row=row, column=4, padx=5, pady=(0, 5))
+        self.cancel_buttons[tab] = ttk.Button(param_frame, text="取消", state=tk.DISABLED,
+                                              command=lambda: self.cancel_job(tab))
+        self.cancel_buttons[tab].grid(row=row, column=5, padx=5, pady=(0, 5))
+
+    # 肘部法的 k=1..9 以及选定的 k 按特征矩阵的哈希和 k 的范围缓存，同一份数据只改变 k 时
+    # 直接复用已有的拟合结果。各个 k 共用一组 k-means++ 初始中心（和命令行的结果一致），
+    # 初始中心在页签线程里选出后，缺少的 k 各提交一个任务，数据量大时交给进程池并行拟合
+    def kmeans_fits(self, X, k, job):
+        ks = sorted(set(pipeline.ELBOW_RANGE) | {k})
+        key = (pipeline.data_fingerprint(X), tuple(pipeline.ELBOW_RANGE))
+        entry = self.kmeans_cache.get(key, {"seeds": None, "fits": {}})
+        job.X, job.entry = X, entry
+        job.missing = [i for i in ks if i not in entry["fits"]]
+        if job.missing:
+            seeds = entry["seeds"]
+            if seeds is None or len(seeds) < ks[-1]:
+                job.submit(self.threads["kmeans"], "seeds", pipeline.run_measured, job.stats, "kmeans_seed",
+                           pipeline.kmeans_seeds, X, ks[-1])
+            else:
+                self.submit_kmeans_fits(job, seeds)
+
+        self.kmeans_cache[key] = entry
+        self.kmeans_cache.move_to_end(key)
+        while len(self.kmeans_cache) > KMEANS_CACHE_SIZE:
+            self.kmeans_cache.popitem(last=False)
+        return entry["fits"]
+
+    def submit_kmeans_fits(self, job, seeds):
+        job.seeds = seeds
+        if len(job.X) >= PARALLEL_MIN_ROWS and len(job.missing) > 1:
+            if self.pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.pool = ProcessPoolExecutor()
+            executor = self.pool
+        else:
+            executor = self.threads["kmeans"]
+        for i in job.missing:
+            stage = None if job.stats is None else ("kmeans_fit" if i == job.k else "elbow")
+            job.submit(executor, i, pipeline.fit_kmeans_measured, job.X, i, stage, seeds)
 
     def build_gui(self):
+        self.profile_var = tk.BooleanVar(value=False)
         self.notebook = ttk.Notebook(self.root)
         self.kmeans_tab = ttk.Frame(self.notebook)
         self.knn_tab = ttk.Frame(self.notebook)
@@ -55,6 +283,11 @@ class AIPlatformUI:
         ttk.Label(param_frame, text="点击一键加载\n（同级目录的第一个Excel或CSV文件）",
                   font=("微软雅黑", 9), foreground="gray").grid(row=1, column=0, columnspan=6)
 
+        self.kmeans_stream_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(param_frame, text="流式处理大文件（仅 CSV，分块读取，不整体载入内存）",
+                        variable=self.kmeans_stream_var).grid(row=2, column=0, columnspan=6, pady=(0, 5))
+        self.build_job_controls(param_frame, "kmeans", row=3)
+
         self.kmeans_file_label = ttk.Label(frame, text="当前文件：未加载", foreground="gray")
         self.kmeans_file_label.pack(pady=(0, 10))
 
@@ -62,19 +295,19 @@ class AIPlatformUI:
         self.kmeans_output_frame.pack(padx=10, pady=5, fill="both")
 
     def load_kmeans_data(self):
-        candidates = [f for f in os.listdir(os.getcwd())
-                      if f.lower().endswith(('.csv', '.xls', '.xlsx'))]
-
-        if not candidates:
+        import_heavy_modules()
+        file = pipeline.find_data_file(os.getcwd())
+        if file is None:
             messagebox.showwarning("未找到文件", "当前目录中未找到任何 Excel 或 CSV 数据文件。")
             return
 
-        file = os.path.join(os.getcwd(), candidates[0])
         try:
-            if file.endswith(".csv"):
-                self.df_kmeans = pd.read_csv(file)
-            else:
-                self.df_kmeans = pd.read_excel(file)
+            self.kmeans_file = file
+            self.df_kmeans = None
+            self.load_stats["kmeans"] = None
+            # 流式处理时只记录路径，聚类时再分块读取
+            if not self.kmeans_stream_var.get():
+                self.df_kmeans = self.load_file("kmeans", file)
 
             self.kmeans_load_btn.config(text="已加载")
             self.kmeans_select_btn.config(text="选择数据")
@@ -83,63 +316,147 @@ class AIPlatformUI:
             messagebox.showerror("加载失败", f"读取文件出错：{str(e)}")
 
     def select_kmeans_file(self):
+        import_heavy_modules()
         file = filedialog.askopenfilename(filetypes=[("CSV 文件", "*.csv"), ("Excel 文件", "*.xls *.xlsx")])
-        if file:
-            self.df_kmeans = pd.read_csv(file)
+        if not file:
+            return
+        try:
+            self.kmeans_file = file
+            self.load_stats["kmeans"] = None
+            self.df_kmeans = None if self.kmeans_stream_var.get() else self.load_file("kmeans", file)
             self.kmeans_select_btn.config(text="已加载")
             self.kmeans_load_btn.config(text="一键加载")
             self.kmeans_file_label.config(text=f"当前文件：{os.path.basename(file)}", foreground="green")
+        except Exception as e:
+            messagebox.showerror("加载失败", f"读取文件出错：{str(e)}")
 
     def run_kmeans(self):
+        import_heavy_modules()
+        if self.kmeans_stream_var.get():
+            self.run_stream_kmeans()
+            return
+        if self.df_kmeans is None and self.kmeans_file is not None:
+            self.load_kmeans_file(self.kmeans_file)
         if self.df_kmeans is None:
             messagebox.showwarning("请先加载数据", "未检测到数据，请点击加载按钮")
             return
         try:
             k = int(self.k_entry.get())
-            X = self.df_kmeans[['SepalLengthCm', 'SepalWidthCm', 'PetalLengthCm', 'PetalWidthCm']]
-            model = KMeans(n_clusters=k, random_state=42, n_init='auto')
-            self.df_kmeans['Cluster'] = model.fit_predict(X)
-            centers = model.cluster_centers_
+        except ValueError as e:
+            messagebox.showerror("聚类失败", str(e))
+            return
+
+        self.cancel_job("kmeans")
+        job = BackgroundJob(self.finish_kmeans, "聚类失败", on_progress=self.update_kmeans)
+        job.df, job.k = self.df_kmeans, k
+        job.seeds = None
+        X = self.df_kmeans[pipeline.FEATURE_COLUMNS].to_numpy()
+        job.stats = self.new_stats("kmeans")
+        job.fits = self.kmeans_fits(X, k, job)
+        self.show_kmeans_view(k)
+        self.start_job("kmeans", job, "正在聚类...")
+
+    # 每次轮询把已完成的 k 写入缓存，并在肘部图上补上对应的点
+    def update_kmeans(self, job):
+        fits = job.fits
+        finished = job.finished()
+        # 初始中心选好后保存到缓存，再提交各个 k 的拟合
+        if job.seeds is None and "seeds" in finished:
+            job.entry["seeds"] = finished["seeds"]
+            self.submit_kmeans_fits(job, finished["seeds"])
+        for i, result in finished.items():
+            if i == "seeds" or i in fits:
+                continue
+            (_, labels, centers, inertia), stats = result
+            fits[i] = (labels, centers, inertia)
+            # 进程池里的统计随结果一起传回，在这里并入本次任务
+            if job.stats is not None and stats is not None:
+                job.stats.merge(stats)
+        ks = [i for i in pipeline.ELBOW_RANGE if i in fits]
+        self.update_elbow(ks, [fits[i][2] for i in ks])
+        self.status_labels["kmeans"].config(text=f"正在聚类...（已完成 {len(ks)}/{len(pipeline.ELBOW_RANGE)} 个 k）")
+
+    def finish_kmeans(self, job):
+        labels, centers, _ = job.fits[job.k]
+        # 计算期间如果加载了新的数据，标签不再写回
+        if job.df is self.df_kmeans:
+            self.df_kmeans['Cluster'] = labels
+        self.show_centers(centers)
+
+    # 流式处理时只记录了文件路径，按块读取文件完成聚类，簇标签写入同目录的 *_clusters.csv
+    def run_stream_kmeans(self):
+        if self.kmeans_file is None:
+            messagebox.showwarning("请先加载数据", "未检测到数据，请点击加载按钮")
+            return
+        if not self.kmeans_file.lower().endswith(".csv"):
+            messagebox.showerror("聚类失败", "流式处理仅支持 CSV 文件")
+            return
+        try:
+            k = int(self.k_entry.get())
+        except ValueError as e:
+            messagebox.showerror("聚类失败", str(e))
+            return
 
-            for widget in self.kmeans_output_frame.winfo_children():
-                widget.destroy()
+        self.cancel_job("kmeans")
+        file = self.kmeans_file
+        labels_path = os.path.splitext(file)[0] + "_clusters.csv"
+        job = BackgroundJob(lambda job: self.finish_stream_kmeans(job, k, file, labels_path), "聚类失败")
+        job.stats = self.new_stats("kmeans")
+        job.submit(self.threads["kmeans"], "stream", pipeline.run_measured, job.stats, "stream_kmeans",
+                   pipeline.stream_kmeans, file, k, labels_path, cancel=job.cancel_event)
+        self.start_job("kmeans", job, "正在分块读取并聚类...")
+
+    def finish_stream_kmeans(self, job, k, file, labels_path):
+        centers, distortions = job.result("stream")
+        self.show_kmeans_view(k)
+        self.update_elbow(pipeline.ELBOW_RANGE, distortions)
+        self.show_centers(centers)
+        self.kmeans_file_label.config(
+            text=f"当前文件：{os.path.basename(file)}（簇标签已写入 {os.path.basename(labels_path)}）",
+            foreground="green")
+
+    def load_kmeans_file(self, file):
+        try:
+            self.df_kmeans = self.load_file("kmeans", file)
+        except Exception as e:
+            messagebox.showerror("加载失败", f"读取文件出错：{str(e)}")
 
+    # 结果区的表格和图只在第一次显示时创建，之后每次运行都原地更新，不再销毁重建
+    def show_kmeans_view(self, k):
+        if self.elbow_canvas is None:
             ttk.Label(self.kmeans_output_frame, text="聚类中心：").pack()
             columns = ["簇", "SepalLen", "SepalWid", "PetalLen", "PetalWid"]
-            table = ttk.Treeview(self.kmeans_output_frame, columns=columns, show="headings", height=k)
+            self.kmeans_table = ttk.Treeview(self.kmeans_output_frame, columns=columns, show="headings")
             for col in columns:
-                table.heading(col, text=col)
-                table.column(col, width=80, anchor="center")
-            for i, c in enumerate(centers):
-                table.insert("", "end", values=[i]+[round(x, 2) for x in c])
-            table.pack(pady=5)
-
-            # Elbow Method 折线图展示
-            distortions = []
-            for i in range(1, 10):
-                km = KMeans(n_clusters=i, random_state=42, n_init='auto')
-                km.fit(X)
-                distortions.append(km.inertia_)
-
-            fig, ax = plt.subplots(figsize=(4.5, 3.5))
-            ax.plot(range(1, 10), distortions, marker='o', color='dodgerblue')
-            ax.set_title("Elbow Method（肘部法）")
-            ax.set_xlabel("簇数量 k")
-            ax.set_ylabel("簇内误差平方和")
-            ax.grid(True)
+                self.kmeans_table.heading(col, text=col)
+                self.kmeans_table.column(col, width=80, anchor="center")
+            self.kmeans_table.pack(pady=5)
+
+            # Elbow Method 折线图展示，随着各个 k 拟合完成逐点补齐
+            fig = Figure(figsize=(4.5, 3.5))
+            self.elbow_line = pipeline.plot_elbow(fig.add_subplot(), [], [])
 
             img_frame = ttk.Frame(self.kmeans_output_frame, borderwidth=2, relief="ridge", padding=5)
             img_frame.pack(pady=10)
-            canvas = FigureCanvasTkAgg(fig, master=img_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-            plt.close(fig)
+            self.elbow_canvas = FigureCanvasTkAgg(fig, master=img_frame)
+            self.elbow_canvas.get_tk_widget().pack()
 
-            self.kmeans_load_btn.config(text="一键加载")
-            self.kmeans_select_btn.config(text="选择数据")
+        self.kmeans_table.delete(*self.kmeans_table.get_children())
+        self.kmeans_table.config(height=k)
+        self.update_elbow([], [])
 
-        except Exception as e:
-            messagebox.showerror("聚类失败", str(e))
+        self.kmeans_load_btn.config(text="一键加载")
+        self.kmeans_select_btn.config(text="选择数据")
+
+    def update_elbow(self, ks, distortions):
+        if list(self.elbow_line.get_xdata()) == list(ks):
+            return
+        pipeline.update_elbow(self.elbow_line, ks, distortions)
+        self.elbow_canvas.draw_idle()
+
+    def show_centers(self, centers):
+        for i, c in enumerate(centers):
+            self.kmeans_table.insert("", "end", values=[i]+[round(x, 2) for x in c])
 
     def show_qa_kmeans(self):
         messagebox.showinfo("📘Q&A",
@@ -170,6 +487,12 @@ class AIPlatformUI:
         ttk.Label(param_frame, text="点击一键加载\n（同级目录的第一个Excel或CSV文件）",
                   font=("微软雅黑", 9), foreground="gray").grid(row=1, column=0, columnspan=6)
 
+        ttk.Button(param_frame, text="批量预测（对未标注的 CSV 分块分类）",
+                   command=self.predict_knn_file).grid(row=2, column=0, columnspan=3, pady=(0, 5))
+        ttk.Button(param_frame, text="k 值选择（交叉验证）",
+                   command=self.run_knn_sweep).grid(row=2, column=3, columnspan=3, pady=(0, 5))
+        self.build_job_controls(param_frame, "knn", row=3)
+
         self.knn_file_label = ttk.Label(frame, text="当前文件：未加载", foreground="gray")
         self.knn_file_label.pack(pady=(0, 10))
 
@@ -177,19 +500,14 @@ class AIPlatformUI:
         self.knn_output_frame.pack(padx=10, pady=5, fill="both")
 
     def load_knn_data(self):
-        candidates = [f for f in os.listdir(os.getcwd())
-                      if f.lower().endswith(('.csv', '.xls', '.xlsx'))]
-
-        if not candidates:
+        import_heavy_modules()
+        file = pipeline.find_data_file(os.getcwd())
+        if file is None:
             messagebox.showwarning("未找到文件", "当前目录中未找到任何 Excel 或 CSV 数据文件。")
             return
 
-        file = os.path.join(os.getcwd(), candidates[0])
         try:
-            if file.endswith(".csv"):
-                self.df_knn = pd.read_csv(file)
-            else:
-                self.df_knn = pd.read_excel(file)
+            self.df_knn = self.load_file("knn", file)
 
             self.knn_load_btn.config(text="已加载")
             self.knn_select_btn.config(text="选择数据")
@@ -198,66 +516,163 @@ class AIPlatformUI:
             messagebox.showerror("加载失败", f"读取文件出错：{str(e)}")
 
     def select_knn_file(self):
+        import_heavy_modules()
         file = filedialog.askopenfilename(filetypes=[("CSV 文件", "*.csv"), ("Excel 文件", "*.xls *.xlsx")])
-        if file:
-            self.df_knn = pd.read_csv(file)
+        if not file:
+            return
+        try:
+            self.df_knn = self.load_file("knn", file)
             self.knn_select_btn.config(text="已加载")
             self.knn_load_btn.config(text="一键加载")
             self.knn_file_label.config(text=f"当前文件：{os.path.basename(file)}", foreground="green")
+        except Exception as e:
+            messagebox.showerror("加载失败", f"读取文件出错：{str(e)}")
 
     def run_knn(self):
+        import_heavy_modules()
         if self.df_knn is None:
             messagebox.showwarning("请先加载数据", "未检测到数据，请点击加载按钮")
             return
         try:
             k = int(self.knn_entry.get())
-            if 'Species' not in self.df_knn.columns:
-                messagebox.showerror("数据错误", "数据集中缺少 'Species' 标签字段")
-                return
-
-            X = self.df_knn[['SepalLengthCm', 'SepalWidthCm', 'PetalLengthCm', 'PetalWidthCm']]
-            y = self.df_knn['Species']
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+        except ValueError as e:
+            messagebox.showerror("分类失败", str(e))
+            return
+        if pipeline.LABEL_COLUMN not in self.df_knn.columns:
+            messagebox.showerror("数据错误", "数据集中缺少 'Species' 标签字段")
+            return
 
-            model = KNeighborsClassifier(n_neighbors=k)
-            model.fit(X_train, y_train)
+        self.cancel_job("knn")
+        X = self.df_knn[pipeline.FEATURE_COLUMNS].to_numpy()
+        y = self.df_knn[pipeline.LABEL_COLUMN].to_numpy()
+        job = BackgroundJob(lambda job: self.show_knn_results(k, *job.result("knn")), "分类失败")
+        job.stats = self.new_stats("knn")
+        job.submit(self.threads["knn"], "knn", self.classify_knn, X, y, k, job.stats)
+        self.start_job("knn", job, "正在分类...")
+
+    # 在 KNN 页签的后台线程中运行；同一页签的任务串行执行，共用的 KD 树不会被并发修改
+    def classify_knn(self, X, y, k, stats=None):
+        with pipeline.measure(stats, "split"):
+            X_train, X_test, y_train, y_test = pipeline.split_knn(X, y)
+        with pipeline.measure(stats, "knn_fit"):
+            model = self.knn_index(X_train, y_train)
+        model.n_neighbors = k
+        with pipeline.measure(stats, "knn_predict"):
             y_pred = model.predict(X_test)
-
-            for widget in self.knn_output_frame.winfo_children():
-                widget.destroy()
-
+        with pipeline.measure(stats, "report"):
             report = classification_report(y_test, y_pred, output_dict=True)
+        return X_test, y_pred, report
 
-            ttk.Label(self.knn_output_frame, text="分类性能指标：").pack()
-            table = ttk.Treeview(self.knn_output_frame, columns=["类名", "精确率", "召回率", "F1值", "支持数"],
-                                 show="headings", height=5)
-            for col in ["类名", "精确率", "召回率", "F1值", "支持数"]:
-                table.heading(col, text=col)
-                table.column(col, width=90, anchor="center")
-            for label in ['Iris-setosa', 'Iris-versicolor', 'Iris-virginica']:
-                m = report[label]
-                row = [label, f"{m['precision']:.2f}", f"{m['recall']:.2f}", f"{m['f1-score']:.2f}", int(m['support'])]
-                table.insert("", "end", values=row)
-            table.pack(pady=5)
-
-            fig, ax = plt.subplots(figsize=(4.5, 3.5))
-            ax.scatter(X_test['PetalLengthCm'], X_test['PetalWidthCm'], c=pd.factorize(y_pred)[0], cmap='Set2')
-            ax.set_title(f"KNN 分类图（k={k}）")
-            ax.set_xlabel("Petal Length")
-            ax.set_ylabel("Petal Width")
-
-            img_frame = ttk.Frame(self.knn_output_frame, borderwidth=2, relief="ridge", padding=5)
-            img_frame.pack(pady=10)
-            canvas = FigureCanvasTkAgg(fig, master=img_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-            plt.close(fig)
+    def show_knn_view(self):
+        if self.knn_canvas is not None:
+            return
+        self.knn_header = ttk.Label(self.knn_output_frame, text="")
+        self.knn_header.pack()
+        columns = ["类名", "精确率", "召回率", "F1值", "支持数"]
+        self.knn_table = ttk.Treeview(self.knn_output_frame, columns=columns, show="headings", height=5)
+        for col in columns:
+            self.knn_table.heading(col, text=col)
+            self.knn_table.column(col, width=90, anchor="center")
+        self.knn_table.pack(pady=5)
+
+        fig = Figure(figsize=(4.5, 3.5))
+        self.knn_ax = fig.add_subplot()
+        self.knn_img_frame = ttk.Frame(self.knn_output_frame, borderwidth=2, relief="ridge", padding=5)
+        self.knn_img_frame.pack(pady=10)
+        self.knn_canvas = FigureCanvasTkAgg(fig, master=self.knn_img_frame)
+        self.knn_canvas.get_tk_widget().pack()
+
+    # 分类散点图和 k 值选择曲线共用一个画布：图的类型不变时只更新数据，切换类型时才重建坐标轴内容
+    def update_knn_plot(self, mode, *args):
+        if mode == self.knn_plot_mode:
+            update = pipeline.update_knn_plot if mode == "scatter" else pipeline.update_knn_sweep
+            update(self.knn_artists, *args)
+        else:
+            self.knn_ax.clear()
+            plot = pipeline.plot_knn if mode == "scatter" else pipeline.plot_knn_sweep
+            self.knn_artists = plot(self.knn_ax, *args)
+            self.knn_plot_mode = mode
+        self.knn_canvas.draw_idle()
+
+    def show_knn_results(self, k, X_test, y_pred, report):
+        self.show_knn_view()
+        self.knn_header.config(text="分类性能指标：")
+        self.knn_table.delete(*self.knn_table.get_children())
+        for label in ['Iris-setosa', 'Iris-versicolor', 'Iris-virginica']:
+            m = report[label]
+            row = [label, f"{m['precision']:.2f}", f"{m['recall']:.2f}", f"{m['f1-score']:.2f}", int(m['support'])]
+            self.knn_table.insert("", "end", values=row)
+        self.knn_table.pack(pady=5, before=self.knn_img_frame)
+        self.update_knn_plot("scatter", X_test, y_pred, k)
+
+        self.knn_load_btn.config(text="一键加载")
+        self.knn_select_btn.config(text="选择数据")
+
+    def run_knn_sweep(self):
+        import_heavy_modules()
+        if self.df_knn is None:
+            messagebox.showwarning("请先加载数据", "未检测到数据，请点击加载按钮")
+            return
+        if pipeline.LABEL_COLUMN not in self.df_knn.columns:
+            messagebox.showerror("数据错误", "数据集中缺少 'Species' 标签字段")
+            return
 
-            self.knn_load_btn.config(text="一键加载")
-            self.knn_select_btn.config(text="选择数据")
+        self.cancel_job("knn")
+        X = self.df_knn[pipeline.FEATURE_COLUMNS].to_numpy()
+        job = BackgroundJob(self.finish_knn_sweep, "k 值选择失败")
+        job.stats = self.new_stats("knn")
+        job.submit(self.threads["knn"], "sweep", pipeline.run_measured, job.stats, "knn_sweep",
+                   pipeline.knn_sweep, X, self.df_knn[pipeline.LABEL_COLUMN], cancel=job.cancel_event)
+        self.start_job("knn", job, f"正在进行 {pipeline.KNN_CV_FOLDS} 折交叉验证...")
+
+    def finish_knn_sweep(self, job):
+        accuracy, f1 = job.result("sweep")
+        best_k = pipeline.KNN_SWEEP_RANGE[int(accuracy.argmax())]
+        self.knn_entry.delete(0, "end")
+        self.knn_entry.insert(0, str(best_k))
+        self.show_knn_sweep(best_k, accuracy, f1)
+
+    def show_knn_sweep(self, best_k, accuracy, f1):
+        self.show_knn_view()
+        best = pipeline.KNN_SWEEP_RANGE.index(best_k)
+        self.knn_header.config(
+            text=f"最佳邻居数 k={best_k}，准确率 {accuracy[best]:.3f}，宏平均 F1 {f1[best]:.3f}（已填入参数设置）")
+        self.knn_table.pack_forget()
+        self.update_knn_plot("sweep", best_k, accuracy, f1)
+
+    def knn_index(self, X, y):
+        key = pipeline.knn_index_key(X, y)
+        if key != self.knn_model_key:
+            self.knn_model, self.knn_model_key = pipeline.load_knn_index(X, y, key), key
+        return self.knn_model
+
+    def predict_knn_file(self):
+        if self.knn_model is None:
+            messagebox.showwarning("请先执行分类", "尚未训练 KNN 模型，请先加载带标签的数据并执行分类")
+            return
+        file = filedialog.askopenfilename(filetypes=[("CSV 文件", "*.csv")])
+        if not file:
+            return
+        try:
+            k = int(self.knn_entry.get())
+        except ValueError as e:
+            messagebox.showerror("预测失败", str(e))
+            return
 
-        except Exception as e:
-            messagebox.showerror("分类失败", str(e))
+        self.cancel_job("knn")
+        output_path = os.path.splitext(file)[0] + "_predictions.csv"
+        job = BackgroundJob(lambda job: self.finish_predict(job, output_path), "预测失败")
+        # 批量预测读取的是另一个文件，不计入训练数据的加载耗时
+        job.stats = self.new_stats("knn", with_load=False)
+        job.submit(self.threads["knn"], "predict", pipeline.run_measured, job.stats, "batch_predict",
+                   pipeline.predict_csv, self.knn_model, k, file, output_path, cancel=job.cancel_event)
+        self.start_job("knn", job, "正在批量预测...")
+
+    def finish_predict(self, job, output_path):
+        counts = job.result("predict")
+        summary = "\n".join(f"{label}：{count}" for label, count in counts.items())
+        messagebox.showinfo("批量预测完成",
+                            f"共预测 {sum(counts.values())} 行，结果已写入 {os.path.basename(output_path)}\n\n{summary}")
 
     def show_qa_knn(self):
         messagebox.showinfo("📘Q&A",
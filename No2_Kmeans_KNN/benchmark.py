@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "sklearn", "pipeline")
+BENCHMARK_DATA_DIR = os.path.join(HERE, ".benchmark_data")
+PIPELINE_SIZES = [150, 10**3, 10**4, 10**5, 10**6, 10**7]
+SYNTHETIC_CHUNK_ROWS = 10**6
+KMEANS_CHECK_K = 3
+KMEANS_WIDE_K = 12  # 界面里选了超出肘部法范围的 k 时，初始中心按更大的 k 重新选取
+KMEANS_MATCH_TOLERANCE = 1e-6
+KMEANS_SEEDINGS = ("independent", "shared")
+# 三个类别的特征均值和标准差，取自 Iris 数据集
+SYNTHETIC_CLASSES = {
+    "Iris-setosa": ([5.0, 3.4, 1.5, 0.2], [0.35, 0.38, 0.17, 0.1]),
+    "Iris-versicolor": ([5.9, 2.8, 4.3, 1.3], [0.52, 0.31, 0.47, 0.2]),
+    "Iris-virginica": ([6.6, 3.0, 5.6, 2.0], [0.64, 0.32, 0.55, 0.27]),
+}
+
+WINDOW_SCRIPT = """
+import time
+started = time.perf_counter()
+import tkinter as tk
+import Kmeans_KNN
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("no-display")
+else:
+    app = Kmeans_KNN.AIPlatformUI(root)
+    root.update()
+    print(time.perf_counter() - started)
+    root.destroy()
+"""
+
+
+def parse_importtime(stderr):
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # 表头
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append({"module": name.strip(), "depth": depth,
+                        "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return entries
+
+
+# 用 -X importtime 在新的解释器里导入界面模块，得到总耗时和各个顶层导入的耗时
+def measure_imports(top):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import Kmeans_KNN"],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    entries = parse_importtime(result.stderr)
+    total = next(e["cumulative_ms"] for e in entries if e["module"] == "Kmeans_KNN" and e["depth"] == 0)
+    heavy = sorted({e["module"].split(".")[0] for e in entries} & set(HEAVY_MODULES))
+    breakdown = sorted((e for e in entries if e["depth"] <= 1), key=lambda e: e["cumulative_ms"], reverse=True)
+    return {"import_ms": total, "heavy_modules": heavy, "breakdown": breakdown[:top]}
+
+
+# 从解释器内部开始计时，到窗口第一次完成绘制为止；没有显示器时返回 None
+def measure_window():
+    result = subprocess.run([sys.executable, "-c", WINDOW_SCRIPT], cwd=HERE,
+                            capture_output=True, text=True, check=True)
+    output = result.stdout.strip()
+    return None if output == "no-display" else float(output) * 1000
+
+
+def benchmark_startup(repeat, top):
+    runs = [measure_imports(top) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r["import_ms"])
+    windows = [ms for ms in (measure_window() for _ in range(repeat)) if ms is not None]
+    best["window_ms"] = min(windows) if windows else None
+    return best
+
+
+def print_startup(result):
+    print(f"导入 Kmeans_KNN: {result['import_ms']:.1f} ms")
+    if result["window_ms"] is None:
+        print("窗口显示: 跳过（没有可用的显示器）")
+    else:
+        print(f"窗口显示: {result['window_ms']:.1f} ms")
+    print(f"{'模块':<40} {'自身(ms)':>10} {'累计(ms)':>10}")
+    for entry in result["breakdown"]:
+        print(f"{'  ' * entry['depth'] + entry['module']:<40} {entry['self_ms']:>10.1f} {entry['cumulative_ms']:>10.1f}")
+
+
+# 生成与 Iris 同结构的 CSV，按行数缓存在 .benchmark_data/ 中，重复运行时直接复用
+def synthetic_dataset(rows):
+    import numpy as np
+    import pandas as pd
+    from pipeline import FEATURE_COLUMNS, LABEL_COLUMN
+
+    path = os.path.join(BENCHMARK_DATA_DIR, f"iris_{rows}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(BENCHMARK_DATA_DIR, exist_ok=True)
+    rng = np.random.default_rng(rows)
+    names = list(SYNTHETIC_CLASSES)
+    means = np.array([SYNTHETIC_CLASSES[name][0] for name in names])
+    scales = np.array([SYNTHETIC_CLASSES[name][1] for name in names])
+    partial = path + ".part"
+    for start in range(0, rows, SYNTHETIC_CHUNK_ROWS):
+        n = min(SYNTHETIC_CHUNK_ROWS, rows - start)
+        labels = rng.integers(len(names), size=n)
+        features = rng.normal(means[labels], scales[labels]).round(1)
+        chunk = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+        chunk[LABEL_COLUMN] = np.array(names)[labels]
+        chunk.to_csv(partial, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    os.replace(partial, path)
+    return path
+
+
+# 在当前进程里无界面地跑完整的流水线（加载、聚类、肘部法、KNN、报告、出图），记录每个阶段的耗时。
+# 计时时不开 tracemalloc；memory 为真时再用 tracemalloc 单独跑一遍，得到各阶段的内存峰值
+def benchmark_pipeline(sizes, budget, memory):
+    from pipeline import PipelineStats, analyse_dataset
+
+    results = []
+    skipped = False
+    with tempfile.TemporaryDirectory() as output_dir:
+        for rows in sizes:
+            if skipped:
+                results.append({"rows": rows, "skipped": True})
+                print_pipeline_row(results[-1])
+                continue
+            path = synthetic_dataset(rows)
+            stats = PipelineStats()
+            started = time.perf_counter()
+            result = analyse_dataset(path, os.path.join(output_dir, str(rows)), plots=True,
+                                     use_cache=False, stats=stats)
+            elapsed = time.perf_counter() - started
+            if memory:
+                traced = PipelineStats(trace_memory=True)
+                analyse_dataset(path, os.path.join(output_dir, str(rows)), plots=True,
+                                use_cache=False, stats=traced)
+                for name, entry in traced.stages.items():
+                    stats.stages[name]["peak_mb"] = entry["peak_mb"]
+            results.append({
+                "rows": rows,
+                "seconds": elapsed,
+                "accuracy": result["knn"]["report"]["accuracy"],
+                "max_rss_mb": stats.max_rss_mb(),
+                "stages": stats.stages,
+            })
+            print_pipeline_row(results[-1])
+
+            # 超过时间预算后跳过更大的数据量
+            skipped = elapsed > budget
+    return results
+
+
+def print_pipeline_header():
+    print(f"{'行数':>10} {'总耗时(s)':>10} {'准确率':>7}  各阶段 耗时(s)[/峰值(MB)]")
+
+
+def print_pipeline_row(result):
+    if result.get("skipped"):
+        print(f"{result['rows']:>10} {'跳过':>10}")
+        return
+    stages = "  ".join(f"{name} {entry['seconds']:.2f}" + (f"/{entry['peak_mb']:.0f}" if "peak_mb" in entry else "")
+                       for name, entry in result["stages"].items())
+    print(f"{result['rows']:>10} {result['seconds']:>10.2f} {result['accuracy']:>7.3f}  {stages}")
+
+
+# 在同一份数据上比较肘部法的两种初始化（不开 tracemalloc）：每个 k 各自做一次 k-means++（independent），
+# 和现在命令行与界面使用的、所有 k 共用一组初始中心（shared）；memory 为真时再单独跑一遍统计内存峰值。
+# 校验肘部法范围内的每个 k：命令行的曲线要和界面按 k 分别提交、初始中心按更大的 k 选取时的结果一致。
+# 共用初始中心与各自初始化的误差平方和之差只作记录，两者都是单次 k-means++，谁更小取决于随机抽样
+def benchmark_kmeans(sizes, budget, memory):
+    from pipeline import (ELBOW_RANGE, FEATURE_COLUMNS, PipelineStats, fit_kmeans, fit_kmeans_measured,
+                          kmeans_elbow, kmeans_seeds, read_dataset)
+
+    def independent(X):
+        return {i: fit_kmeans(X, i)[1:] for i in sorted(set(ELBOW_RANGE) | {KMEANS_CHECK_K})}
+
+    def shared(X):
+        return kmeans_elbow(X, KMEANS_CHECK_K)
+
+    results = []
+    skipped = False
+    for rows in sizes:
+        if skipped:
+            results.append({"rows": rows, "skipped": True})
+            print_kmeans_row(results[-1])
+            continue
+        X = read_dataset(synthetic_dataset(rows))[FEATURE_COLUMNS].to_numpy()
+        result = {"rows": rows, "seedings": {}}
+        curves = {}
+        for name, sweep in (("independent", independent), ("shared", shared)):
+            started = time.perf_counter()
+            fits = sweep(X)
+            result["seedings"][name] = {"seconds": time.perf_counter() - started}
+            curves[name] = [fits[i][2] for i in ELBOW_RANGE]
+            if memory:
+                stats = PipelineStats(trace_memory=True)
+                with stats.stage("elbow"):
+                    sweep(X)
+                result["seedings"][name]["peak_mb"] = stats.stages["elbow"]["peak_mb"]
+
+        seeds = kmeans_seeds(X, KMEANS_WIDE_K)
+        window = [fit_kmeans_measured(X, i, None, seeds)[0][3] for i in ELBOW_RANGE]
+        result["curve_gap"] = max(abs(a - b) / b for a, b in zip(window, curves["shared"]))
+        result["seeding_gap"] = max((a - b) / b for a, b in zip(curves["shared"], curves["independent"]))
+        result["ok"] = result["curve_gap"] <= KMEANS_MATCH_TOLERANCE
+        results.append(result)
+        print_kmeans_row(result)
+
+        skipped = max(e["seconds"] for e in result["seedings"].values()) > budget
+    return results
+
+
+def print_kmeans_header():
+    print(f"{'行数':>10} {'各自初始化(s)':>13} {'峰值(MB)':>9} {'共用初始化(s)':>13} {'峰值(MB)':>9} {'加速':>6} "
+          f"{'误差增幅':>9} 界面一致")
+
+
+def print_kmeans_row(result):
+    if result.get("skipped"):
+        print(f"{result['rows']:>10} {'跳过':>13}")
+        return
+    before, after = (result["seedings"][name] for name in KMEANS_SEEDINGS)
+    before_peak, after_peak = (f"{e['peak_mb']:.1f}" if "peak_mb" in e else "-" for e in (before, after))
+    print(f"{result['rows']:>10} {before['seconds']:>13.2f} {before_peak:>9} {after['seconds']:>13.2f} "
+          f"{after_peak:>9} {before['seconds'] / after['seconds']:>5.1f}x {result['seeding_gap']:>+9.2%} "
+          f"{'通过' if result['ok'] else '错误'}")
+
+
+# 各阶段耗时随数据量变化的双对数曲线
+def save_scaling_curve(path, results):
+    from matplotlib.figure import Figure
+    from pipeline import STAGE_NAMES
+
+    measured = [r for r in results if not r.get("skipped")]
+    fig = Figure(figsize=(7, 5))
+    ax = fig.add_subplot()
+    ax.plot([r["rows"] for r in measured], [r["seconds"] for r in measured], "k-o", label="总计")
+    for name in STAGE_NAMES:
+        points = [(r["rows"], r["stages"][name]["seconds"]) for r in measured if name in r["stages"]]
+        if points:
+            ax.plot(*zip(*points), "-o", markersize=3, label=STAGE_NAMES[name])
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("行数")
+    ax.set_ylabel("耗时 (s)")
+    ax.set_title("流水线各阶段耗时")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+# 与基线结果比较：启动耗时和每个数据量的总耗时超过基线的 (1 + tolerance) 倍即视为退化
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    current, previous = results.get("startup"), baseline.get("startup")
+    if current and previous and current["import_ms"] > previous["import_ms"] * (1 + tolerance):
+        regressions.append(f"启动导入 {current['import_ms']:.1f} ms（基线 {previous['import_ms']:.1f} ms）")
+    previous_runs = {r["rows"]: r for r in baseline.get("pipeline", []) if not r.get("skipped")}
+    for run in results.get("pipeline", []):
+        previous = previous_runs.get(run["rows"])
+        if run.get("skipped") or previous is None:
+            continue
+        if run["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append(f"{run['rows']} 行 {run['seconds']:.2f} s（基线 {previous['seconds']:.2f} s）")
+    previous_runs = {r["rows"]: r for r in baseline.get("kmeans", []) if not r.get("skipped")}
+    for run in results.get("kmeans", []):
+        previous = previous_runs.get(run["rows"])
+        if run.get("skipped") or previous is None:
+            continue
+        for name, entry in run["seedings"].items():
+            before = previous.get("seedings", {}).get(name)
+            if before and entry["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append(f"肘部法（{name}）{run['rows']} 行 {entry['seconds']:.2f} s"
+                                   f"（基线 {before['seconds']:.2f} s）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KMeans & KNN 平台基准测试")
+    parser.add_argument("--suites", nargs="+", default=["startup", "pipeline"],
+                        choices=["startup", "pipeline", "kmeans"], help="kmeans 对比肘部法的两种初始化，默认不运行")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快的一次")
+    parser.add_argument("--top", type=int, default=10, help="显示耗时最多的前几个导入")
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="启动耗时上限，超过时以失败退出")
+    parser.add_argument("--sizes", type=int, nargs="+", default=PIPELINE_SIZES, help="流水线测试的数据行数")
+    parser.add_argument("--budget", type=float, default=120.0, help="单次流水线运行超过该秒数后跳过更大的数据量")
+    parser.add_argument("--memory", action="store_true",
+                        help="再用 tracemalloc 单独跑一遍，记录各阶段的内存峰值（计时那一遍不受影响）")
+    parser.add_argument("--curve", help="保存各阶段耗时随行数变化的曲线图")
+    parser.add_argument("--baseline", help="用于比较的历史结果文件，耗时明显变长时以失败退出")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="相对基线允许变慢的比例")
+    parser.add_argument("--json", default="benchmark_results.json", help="结果输出文件")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    failures = []
+    if "startup" in args.suites:
+        startup = results["startup"] = benchmark_startup(args.repeat, args.top)
+        print_startup(startup)
+        if startup["heavy_modules"]:
+            failures.append(f"启动时导入了 {', '.join(startup['heavy_modules'])}")
+        slowest = max(ms for ms in (startup["import_ms"], startup["window_ms"]) if ms is not None)
+        if slowest > args.budget_ms:
+            failures.append(f"启动耗时 {slowest:.1f} ms 超过 {args.budget_ms:.0f} ms")
+    if "pipeline" in args.suites:
+        print_pipeline_header()
+        results["pipeline"] = benchmark_pipeline(sorted(args.sizes), args.budget, args.memory)
+        if args.curve:
+            save_scaling_curve(args.curve, results["pipeline"])
+            print(f"曲线已保存到 {args.curve}")
+    if "kmeans" in args.suites:
+        print_kmeans_header()
+        results["kmeans"] = benchmark_kmeans(sorted(args.sizes), args.budget, args.memory)
+        mismatched = [r["rows"] for r in results["kmeans"] if not r.get("skipped") and not r["ok"]]
+        if mismatched:
+            failures.append(f"{', '.join(map(str, mismatched))} 行上界面与命令行的肘部法曲线不一致")
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures += [f"性能退化：{r}" for r in find_regressions(results, baseline, args.tolerance)]
+    if failures:
+        print("；".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
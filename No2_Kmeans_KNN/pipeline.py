@@ -0,0 +1,740 @@
+import argparse
+import csv
+import json
+import os
+import hashlib
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.markers import MarkerStyle
+from sklearn.cluster import KMeans, MiniBatchKMeans, kmeans_plusplus
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+from sklearn.model_selection import train_test_split, StratifiedKFold
+from sklearn.metrics import classification_report
+from threadpoolctl import threadpool_limits
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+matplotlib.rcParams['font.sans-serif'] = ['SimHei']
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+FEATURE_COLUMNS = ['SepalLengthCm', 'SepalWidthCm', 'PetalLengthCm', 'PetalWidthCm']
+LABEL_COLUMN = 'Species'
+DATA_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+DATASET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dataset_cache")
+ELBOW_RANGE = range(1, 10)
+KNN_INDEX_DISK_LIMIT = 1 << 30  # 保存的 KNN 索引总大小上限，超出时删除最久未用的
+KNN_BATCH_SIZE = 100000
+KNN_SWEEP_RANGE = range(1, 51)
+KNN_CV_FOLDS = 5
+KNN_TEST_SIZE = 0.3
+TASKS = ('kmeans', 'knn')
+SCATTER_LIMIT = 20000
+SCATTER_GRID = 96
+SCATTER_CELL_AREA = 8.0  # 4.5 英寸宽的图上一个网格单元约 2.6pt 见方
+SCATTER_ALPHA = (0.15, 1.0)  # 直方图模式下点的透明度范围，对应网格单元内点数的对数
+KMEANS_RANDOM_STATE = 42
+KMEANS_SEED_TRIALS = 2 + int(np.log(max(ELBOW_RANGE)))  # 固定每步的候选数，k_max 不同时选出的前几个中心也相同
+STAGE_NAMES = {
+    "load": "加载",
+    "kmeans_seed": "初始中心",
+    "kmeans_fit": "KMeans",
+    "elbow": "肘部法",
+    "stream_kmeans": "流式聚类",
+    "split": "划分数据",
+    "knn_fit": "KNN 建树",
+    "knn_predict": "KNN 预测",
+    "report": "分类报告",
+    "knn_sweep": "k 值选择",
+    "batch_predict": "批量预测",
+    "render": "绘图",
+}
+STREAM_CHUNK_SIZE = 100000
+STREAM_SAMPLE_SIZE = 50000
+
+
+# 进程到目前为止的常驻内存峰值（字节）。resource 只在类 Unix 系统上有，其他平台返回 None
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+# 按阶段记录耗时，以及阶段结束时进程的常驻内存峰值（rss_mb）。
+# tracemalloc 会让分配内存多的代码慢上好几倍，而且不同库慢得不一样，所以默认不开启；
+# trace_memory=True 时额外记录每个阶段相对开始时多分配的内存峰值（peak_mb），这时的耗时不可信，
+# 应当另跑一遍专门统计内存。多个阶段在不同线程里同时被跟踪时峰值会互相叠加，只能作参考。
+# 进程池里的任务各自统计后随结果返回再合并
+class PipelineStats:
+    _tracing_lock = threading.Lock()
+    _tracing_users = 0
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def add(self, name, seconds, peak_bytes=None, calls=1, rss_bytes=None):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += calls
+        if peak_bytes is not None:
+            entry["peak_mb"] = max(entry.get("peak_mb", 0.0), peak_bytes / 2**20)
+        if rss_bytes is not None:
+            entry["rss_mb"] = max(entry.get("rss_mb", 0.0), rss_bytes / 2**20)
+
+    def merge(self, other, name=None):
+        for stage, entry in other.stages.items():
+            peak = entry["peak_mb"] * 2**20 if "peak_mb" in entry else None
+            rss = entry["rss_mb"] * 2**20 if "rss_mb" in entry else None
+            self.add(name or stage, entry["seconds"], peak, entry["calls"], rss)
+
+    def total_seconds(self):
+        return sum(entry["seconds"] for entry in self.stages.values())
+
+    def max_rss_mb(self):
+        return max((entry["rss_mb"] for entry in self.stages.values() if "rss_mb" in entry), default=None)
+
+    def as_dict(self):
+        return {"total_seconds": self.total_seconds(), "max_rss_mb": self.max_rss_mb(),
+                "trace_memory": self.trace_memory, "stages": self.stages}
+
+    # 按流水线的阶段顺序显示，未登记的阶段排在最后
+    def summary(self):
+        order = list(STAGE_NAMES)
+        names = sorted(self.stages, key=lambda name: order.index(name) if name in order else len(order))
+        parts = []
+        for name in names:
+            entry = self.stages[name]
+            peak = f"/{entry['peak_mb']:.1f}MB" if "peak_mb" in entry else ""
+            parts.append(f"{STAGE_NAMES.get(name, name)} {entry['seconds']:.2f}s{peak}")
+        if self.max_rss_mb() is not None:
+            parts.append(f"内存峰值 {self.max_rss_mb():.0f}MB")
+        return "  ".join(parts)
+
+    @classmethod
+    def start_tracing(cls):
+        with cls._tracing_lock:
+            if cls._tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            cls._tracing_users += 1
+
+    @classmethod
+    def stop_tracing(cls):
+        with cls._tracing_lock:
+            cls._tracing_users -= 1
+            if cls._tracing_users == 0:
+                tracemalloc.stop()
+
+
+class _StageTimer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        if self.stats.trace_memory:
+            PipelineStats.start_tracing()
+            self.memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        peak = None
+        if self.stats.trace_memory:
+            peak = max(tracemalloc.get_traced_memory()[1] - self.memory, 0)
+            PipelineStats.stop_tracing()
+        self.stats.add(self.name, elapsed, peak, rss_bytes=max_rss_bytes())
+        return False
+
+
+def measure(stats, name):
+    return nullcontext() if stats is None else stats.stage(name)
+
+
+def run_measured(stats, name, fn, *args, **kwargs):
+    with measure(stats, name):
+        return fn(*args, **kwargs)
+
+
+# seeds 是 kmeans_seeds 生成的初始中心，取前 k 个；肘部法的各个 k 共用同一组，省去每次重新选取
+def fit_kmeans(X, k, seeds=None):
+    if seeds is None:
+        model = KMeans(n_clusters=k, random_state=KMEANS_RANDOM_STATE, n_init='auto')
+    else:
+        model = KMeans(n_clusters=k, init=seeds[:k], n_init=1)
+    labels = model.fit_predict(X)
+    return k, labels, model.cluster_centers_, model.inertia_
+
+
+# 提交到线程池或进程池的拟合任务，需要统计时在任务内部计时，统计结果随拟合结果一起返回
+def fit_kmeans_measured(X, k, stage=None, seeds=None):
+    if stage is None:
+        return fit_kmeans(X, k, seeds), None
+    stats = PipelineStats()
+    with stats.stage(stage):
+        result = fit_kmeans(X, k, seeds)
+    return result, stats
+
+
+# 贪心 k-means++ 一次选出 k_max 个初始中心。每步的候选数固定，前 k 个中心本身就是一次完整的 k-means++ 选取，
+# 所以肘部法的所有 k 可以共用这一组，选更大的 k 时已有的 k 也不必重算
+def kmeans_seeds(X, k_max, random_state=KMEANS_RANDOM_STATE):
+    if k_max > len(X):
+        raise ValueError(f"样本数 {len(X)} 少于聚类数 {k_max}")
+    centers, _ = kmeans_plusplus(np.asarray(X), k_max, random_state=random_state, n_local_trials=KMEANS_SEED_TRIALS)
+    return centers
+
+
+class Cancelled(Exception):
+    pass
+
+
+# 长时间运行的函数接受一个 threading.Event，在每个数据块或每一折之间检查，被置位时中止
+def check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+def find_data_file(directory):
+    candidates = [f for f in os.listdir(directory) if f.lower().endswith(DATA_EXTENSIONS)]
+    return os.path.join(directory, candidates[0]) if candidates else None
+
+
+def read_dataset(path):
+    columns = set(FEATURE_COLUMNS) | {LABEL_COLUMN}
+    options = {"usecols": lambda c: c in columns, "dtype": {c: np.float32 for c in FEATURE_COLUMNS}}
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, **options)
+    else:
+        df = pd.read_excel(path, **options)
+
+    missing = [c for c in FEATURE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"数据集中缺少特征字段：{', '.join(missing)}")
+    if LABEL_COLUMN not in df.columns:
+        return df[FEATURE_COLUMNS]
+    df[LABEL_COLUMN] = df[LABEL_COLUMN].astype("category")
+    return df[FEATURE_COLUMNS + [LABEL_COLUMN]]
+
+
+# 两个页签共用的加载入口：解析结果按文件路径、修改时间和大小缓存为 .npy，
+# 特征矩阵以内存映射方式读回，同一文件再次加载时不再解析 CSV/Excel
+def load_dataset(path):
+    stat = os.stat(path)
+    path_key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    prefix = os.path.join(DATASET_CACHE_DIR, f"{path_key}-{stat.st_mtime_ns}-{stat.st_size}")
+    if os.path.exists(prefix + ".features.npy"):
+        return read_dataset_cache(prefix)
+
+    df = read_dataset(path)
+    try:
+        write_dataset_cache(prefix, df)
+    except OSError:
+        pass  # 缓存只是加速手段，写不进去时照常使用解析结果
+    return df
+
+
+def read_dataset_cache(prefix):
+    features = np.load(prefix + ".features.npy", mmap_mode="r")
+    df = pd.DataFrame(features, columns=FEATURE_COLUMNS, copy=False)
+    if os.path.exists(prefix + ".categories.npy"):
+        codes = np.load(prefix + ".codes.npy")
+        categories = np.load(prefix + ".categories.npy")
+        df[LABEL_COLUMN] = pd.Categorical.from_codes(codes, categories)
+    return df
+
+
+def write_dataset_cache(prefix, df):
+    os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+    # 同一路径的旧版本缓存（文件被修改过）一并清理
+    name = os.path.basename(prefix)
+    path_key = name.split("-")[0]
+    for entry in os.listdir(DATASET_CACHE_DIR):
+        if entry.startswith(path_key + "-") and not entry.startswith(name + "."):
+            os.remove(os.path.join(DATASET_CACHE_DIR, entry))
+
+    arrays = {}
+    if LABEL_COLUMN in df.columns:
+        labels = df[LABEL_COLUMN].cat
+        arrays["codes"] = labels.codes.to_numpy()
+        arrays["categories"] = labels.categories.astype(str).to_numpy(dtype=str)
+    # 特征矩阵最后写入，它存在即表示该缓存完整
+    arrays["features"] = np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+    for suffix, array in arrays.items():
+        tmp = f"{prefix}.{suffix}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, f"{prefix}.{suffix}.npy")
+
+
+def read_feature_chunks(path, chunk_size):
+    for chunk in pd.read_csv(path, usecols=FEATURE_COLUMNS, dtype=np.float32, chunksize=chunk_size):
+        yield chunk[FEATURE_COLUMNS].to_numpy()
+
+
+# 逐块做蓄水池抽样：前 size 行直接放入，之后第 t 行以 size / (t + 1) 的概率替换样本中随机的一行。
+# 文件不超过 size 行时样本就是整个文件。返回样本和文件的总行数
+def reservoir_sample(chunks, size, rng, cancel=None):
+    sample = None
+    rows = 0
+    for X in chunks:
+        check_cancel(cancel)
+        if sample is None:
+            sample = np.empty((size, X.shape[1]), dtype=X.dtype)
+        fill = min(max(size - rows, 0), len(X))
+        sample[rows:rows + fill] = X[:fill]
+        seen = rows + np.arange(fill, len(X))
+        slots = rng.integers(0, seen + 1)
+        chosen = np.flatnonzero(slots < size)
+        # 同一个位置被多次选中时保留最后一行，与逐行处理的结果一致
+        last = len(chosen) - 1 - np.unique(slots[chosen][::-1], return_index=True)[1]
+        sample[slots[chosen[last]]] = X[fill + chosen[last]]
+        rows += len(X)
+    if sample is None:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32), 0
+    return sample[:min(rows, size)], rows
+
+
+# 流式聚类，内存占用只与 chunk_size 和抽样大小有关：
+# 第一遍均匀抽样，用样本上的 KMeans 结果作为各个 k 的初始质心；
+# 第二遍逐块 partial_fit 细化质心；第三遍逐块累加簇内误差平方和，
+# 并把选定 k 的簇标签写入 labels_path。
+# 文件可能按类别排好序，单个块里只有一个簇的点，所以关闭 MiniBatchKMeans 的质心重分配
+def stream_kmeans(path, k, labels_path, chunk_size=STREAM_CHUNK_SIZE, cancel=None):
+    ks = sorted(set(ELBOW_RANGE) | {k})
+    rng = np.random.default_rng(42)
+    sample, rows = reservoir_sample(read_feature_chunks(path, chunk_size), STREAM_SAMPLE_SIZE, rng, cancel)
+    if rows < ks[-1]:
+        raise ValueError(f"数据只有 {rows} 行，少于所需的聚类数 {ks[-1]}")
+
+    models = {}
+    for i in ks:
+        init = fit_kmeans(sample, i)[2]
+        models[i] = MiniBatchKMeans(n_clusters=i, init=init, n_init=1,
+                                    reassignment_ratio=0.0, random_state=42)
+    for X in read_feature_chunks(path, chunk_size):
+        check_cancel(cancel)
+        for model in models.values():
+            model.partial_fit(X)
+
+    inertias = dict.fromkeys(ks, 0.0)
+    header = True
+    for X in read_feature_chunks(path, chunk_size):
+        check_cancel(cancel)
+        for i, model in models.items():
+            inertias[i] -= model.score(X)
+        labels = pd.DataFrame({'Cluster': models[k].predict(X)})
+        labels.to_csv(labels_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+    return models[k].cluster_centers_, [inertias[i] for i in ELBOW_RANGE]
+
+
+def data_fingerprint(X):
+    X = np.ascontiguousarray(X)
+    digest = hashlib.sha1(X.tobytes()).hexdigest()
+    return f"{X.shape}-{X.dtype}-{digest}"
+
+
+def labels_fingerprint(y):
+    codes, uniques = pd.factorize(y)
+    digest = hashlib.sha1(codes.tobytes())
+    digest.update(repr(list(uniques)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# KD 树只取决于训练集，与邻居数 k 无关：按训练集的哈希保存到磁盘，
+# 数据不变时直接读回，预测前再设置 n_neighbors
+def knn_index_key(X, y):
+    return hashlib.sha1(f"{data_fingerprint(X)}-{labels_fingerprint(y)}".encode("utf-8")).hexdigest()
+
+
+def load_knn_index(X, y, key):
+    path = os.path.join(DATASET_CACHE_DIR, f"knn-{key}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        # 修改时间记为最近一次使用的时间，清理时按它决定先后
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return model
+
+    model = KNeighborsClassifier(algorithm="kd_tree")
+    model.fit(X, y)
+    try:
+        os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        evict_knn_indexes(keep=path)
+    except OSError:
+        pass
+    return model
+
+
+# 每个不同的训练集都会保存一份索引（含训练数据的副本），总大小超过上限时从最久未用的开始删除，
+# 刚写入的那一份保留
+def evict_knn_indexes(keep=None):
+    entries = []
+    for name in os.listdir(DATASET_CACHE_DIR):
+        if name.startswith("knn-") and name.endswith(".pkl"):
+            path = os.path.join(DATASET_CACHE_DIR, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= KNN_INDEX_DISK_LIMIT:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total -= size
+
+
+# k 值选择：每一折只按最大的 k 查询一次近邻，近邻按距离排好序，
+# 对近邻标签的 one-hot 沿近邻方向做累加，第 k 列就是前 k 个近邻的投票数，
+# 所有 k 的预测由同一次查询得到。类别按排序后的顺序编号（与 KNeighborsClassifier 的 classes_ 相同），
+# 平票时取编号较小的类，结果与 KNeighborsClassifier 一致
+def macro_f1(y_true, y_pred, n_classes):
+    # y_pred 每一列是一个 k 的预测，一次 bincount 得到所有 k 的混淆矩阵
+    n_k = y_pred.shape[1]
+    cells = (np.arange(n_k) * n_classes + y_true[:, None]) * n_classes + y_pred
+    confusion = np.bincount(cells.ravel(), minlength=n_k * n_classes * n_classes)
+    confusion = confusion.reshape(n_k, n_classes, n_classes)
+    tp = np.diagonal(confusion, axis1=1, axis2=2)
+    support = confusion.sum(axis=1) + confusion.sum(axis=2)
+    f1 = np.divide(2 * tp, support, out=np.zeros(support.shape), where=support > 0)
+    # 与 sklearn 一致，只对真实值或预测值中出现过的类别取平均
+    return f1.sum(axis=1) / np.maximum((support > 0).sum(axis=1), 1)
+
+
+def knn_sweep(X, y, ks=KNN_SWEEP_RANGE, folds=KNN_CV_FOLDS, cancel=None):
+    classes, codes = np.unique(np.asarray(y), return_inverse=True)
+    accuracy = np.zeros(len(ks))
+    f1 = np.zeros(len(ks))
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for train, test in splitter.split(X, codes):
+        check_cancel(cancel)
+        k_max = min(max(ks), len(train))
+        index = NearestNeighbors(algorithm="kd_tree", n_jobs=-1).fit(X[train])
+        neighbours = index.kneighbors(X[test], n_neighbors=k_max, return_distance=False)
+        votes = codes[train][neighbours][:, :, None] == np.arange(len(classes))
+        votes = votes.cumsum(axis=1, dtype=np.int16)
+        y_pred = votes[:, [min(k, k_max) - 1 for k in ks]].argmax(axis=2)
+        accuracy += (y_pred == codes[test][:, None]).mean(axis=0)
+        f1 += macro_f1(codes[test], y_pred, len(classes))
+    return accuracy / folds, f1 / folds
+
+
+# 批量预测：逐块读取未标注的 CSV，预测结果逐块追加写入 output_path，
+# 查询的内存占用只与 chunk_size 和 k 有关
+def predict_csv(model, k, path, output_path, chunk_size=KNN_BATCH_SIZE, cancel=None):
+    model.n_neighbors = k
+    counts = {}
+    header = True
+    for X in read_feature_chunks(path, chunk_size):
+        check_cancel(cancel)
+        y_pred = model.predict(X)
+        pd.DataFrame({LABEL_COLUMN: y_pred}).to_csv(output_path, mode='w' if header else 'a',
+                                                    header=header, index=False)
+        header = False
+        labels, label_counts = np.unique(y_pred, return_counts=True)
+        for label, count in zip(labels, label_counts):
+            counts[label] = counts.get(label, 0) + int(count)
+    return counts
+
+
+def kmeans_elbow(X, k, stats=None):
+    ks = sorted(set(ELBOW_RANGE) | {k})
+    with measure(stats, "kmeans_seed"):
+        seeds = kmeans_seeds(X, ks[-1])
+    fits = {}
+    for i in ks:
+        with measure(stats, "kmeans_fit" if i == k else "elbow"):
+            fits[i] = fit_kmeans(X, i, seeds)[1:]
+    return fits
+
+
+def split_knn(X, y):
+    return train_test_split(X, y, test_size=KNN_TEST_SIZE, random_state=42)
+
+
+def knn_report(X, y, k, stats=None):
+    with measure(stats, "split"):
+        X_train, X_test, y_train, y_test = split_knn(X, y)
+    with measure(stats, "knn_fit"):
+        model = KNeighborsClassifier(n_neighbors=k, algorithm="kd_tree")
+        model.fit(X_train, y_train)
+    with measure(stats, "knn_predict"):
+        y_pred = model.predict(X_test)
+    with measure(stats, "report"):
+        report = classification_report(y_test, y_pred, output_dict=True)
+    return X_test, y_pred, report
+
+
+# 各个 plot_* 创建图形元素并返回，界面保留同一个画布，之后用对应的 update_* 原地更新数据
+def plot_elbow(ax, ks, distortions):
+    line, = ax.plot([], [], marker='o', color='dodgerblue')
+    ax.set_xlim(ELBOW_RANGE[0] - 0.5, ELBOW_RANGE[-1] + 0.5)
+    ax.set_xticks(ELBOW_RANGE)
+    ax.set_title("Elbow Method（肘部法）")
+    ax.set_xlabel("簇数量 k")
+    ax.set_ylabel("簇内误差平方和")
+    ax.grid(True)
+    update_elbow(line, ks, distortions)
+    return line
+
+
+def update_elbow(line, ks, distortions):
+    line.set_data(list(ks), list(distortions))
+    line.axes.relim()
+    line.axes.autoscale_view(scalex=False)
+
+
+# 测试集超过 SCATTER_LIMIT 个点时改画二维直方图：按 SCATTER_GRID × SCATTER_GRID 的网格对每个类别做 bincount，
+# 每个有点的（类别, 网格单元）在单元中心画一个大小约为一个单元的方块，不透明度随单元内点数的对数增大，
+# 只有一个点的单元和有上万个点的单元能区分开。抽稀是 O(n) 的，绘制的点数有固定上限，
+# 重绘耗时不再随数据量增长。返回点的位置、类别编号和不透明度（None 表示逐点绘制，不透明）
+def scatter_points(X_test, y_pred):
+    points = X_test[:, [FEATURE_COLUMNS.index('PetalLengthCm'), FEATURE_COLUMNS.index('PetalWidthCm')]]
+    classes, codes = np.unique(y_pred, return_inverse=True)
+    if len(points) <= SCATTER_LIMIT:
+        return points, codes, None
+
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, np.finfo(np.float32).eps)
+    cells = np.minimum(((points - low) / span * SCATTER_GRID).astype(np.int64), SCATTER_GRID - 1)
+    keys = (codes * SCATTER_GRID + cells[:, 0]) * SCATTER_GRID + cells[:, 1]
+    counts = np.bincount(keys, minlength=len(classes) * SCATTER_GRID * SCATTER_GRID)
+    occupied = np.flatnonzero(counts)
+    density = np.log1p(counts[occupied]) / np.log1p(counts.max())
+    alpha = SCATTER_ALPHA[0] + (SCATTER_ALPHA[1] - SCATTER_ALPHA[0]) * density
+    codes, cells = np.divmod(occupied, SCATTER_GRID * SCATTER_GRID)
+    cells = np.column_stack(np.divmod(cells, SCATTER_GRID))
+    return low + (cells + 0.5) * span / SCATTER_GRID, codes, alpha
+
+
+def plot_knn(ax, X_test, y_pred, k):
+    points = ax.scatter(np.empty(0), np.empty(0), c=np.empty(0), cmap='Set2')
+    ax.set_xlabel("Petal Length")
+    ax.set_ylabel("Petal Width")
+    update_knn_plot(points, X_test, y_pred, k)
+    return points
+
+
+def update_knn_plot(points, X_test, y_pred, k):
+    offsets, codes, alpha = scatter_points(X_test, y_pred)
+    points.set_offsets(offsets)
+    points.set_array(codes)
+    # 数组形式的透明度不能再设回 None，逐点绘制时传全 1 的数组
+    points.set_alpha(alpha if alpha is not None else np.ones(len(offsets)))
+    # 直方图模式用接近单元大小的方块铺满网格，逐点绘制时恢复默认的圆点
+    marker = MarkerStyle('s' if alpha is not None else 'o')
+    points.set_paths([marker.get_path().transformed(marker.get_transform())])
+    points.set_sizes([SCATTER_CELL_AREA if alpha is not None else matplotlib.rcParams['lines.markersize'] ** 2])
+    points.set_clim(0, max(codes.max(initial=0), 1))
+    ax = points.axes
+    ax.set_title(f"KNN 分类图（k={k}）")
+    ax.ignore_existing_data_limits = True
+    ax.update_datalim(offsets)
+    ax.autoscale_view()
+
+
+def plot_knn_sweep(ax, best_k, accuracy, f1):
+    accuracy_line, = ax.plot([], [], marker='o', markersize=3, color='dodgerblue', label="准确率")
+    f1_line, = ax.plot([], [], marker='s', markersize=3, color='darkorange', label="宏平均 F1")
+    best_line = ax.axvline(best_k, color='gray', linestyle='--')
+    ax.set_title(f"k 值选择（{KNN_CV_FOLDS} 折交叉验证）")
+    ax.set_xlabel("邻居数 k")
+    ax.set_ylabel("得分")
+    ax.legend()
+    ax.grid(True)
+    artists = (accuracy_line, f1_line, best_line)
+    update_knn_sweep(artists, best_k, accuracy, f1)
+    return artists
+
+
+def update_knn_sweep(artists, best_k, accuracy, f1):
+    accuracy_line, f1_line, best_line = artists
+    accuracy_line.set_data(list(KNN_SWEEP_RANGE), accuracy)
+    f1_line.set_data(list(KNN_SWEEP_RANGE), f1)
+    best_line.set_xdata([best_k, best_k])
+    accuracy_line.axes.relim()
+    accuracy_line.axes.autoscale_view()
+
+
+# 直接使用 Figure 而不经过 pyplot，保存 PNG 时由 Agg 渲染，不需要显示器
+def save_plot(path, plot, *args):
+    fig = Figure(figsize=(4.5, 3.5))
+    plot(fig.add_subplot(), *args)
+    fig.savefig(path, dpi=100, bbox_inches="tight")
+
+
+# 对单个数据集执行聚类和分类，结果写入 output_dir：
+# result.json（质心、肘部曲线、分类报告）、clusters.csv、predictions.csv，以及可选的 PNG 图
+def analyse_dataset(path, output_dir, k=3, knn_k=5, tasks=TASKS, plots=False, use_cache=True, stats=None):
+    with measure(stats, "load"):
+        df = load_dataset(path) if use_cache else read_dataset(path)
+    X = df[FEATURE_COLUMNS].to_numpy()
+    os.makedirs(output_dir, exist_ok=True)
+    result = {"path": path, "output": output_dir, "rows": len(df)}
+
+    if "kmeans" in tasks:
+        fits = kmeans_elbow(X, k, stats)
+        labels, centers, inertia = fits[k]
+        distortions = [float(fits[i][2]) for i in ELBOW_RANGE]
+        pd.DataFrame({"Cluster": labels}).to_csv(os.path.join(output_dir, "clusters.csv"), index=False)
+        result["kmeans"] = {
+            "k": k,
+            "centers": centers.tolist(),
+            "inertia": float(inertia),
+            "elbow": dict(zip(ELBOW_RANGE, distortions)),
+        }
+        if plots:
+            with measure(stats, "render"):
+                save_plot(os.path.join(output_dir, "elbow.png"), plot_elbow, ELBOW_RANGE, distortions)
+
+    if "knn" in tasks:
+        if LABEL_COLUMN not in df.columns:
+            result["knn"] = {"skipped": f"数据集中缺少 '{LABEL_COLUMN}' 标签字段"}
+        else:
+            X_test, y_pred, report = knn_report(X, df[LABEL_COLUMN].to_numpy(), knn_k, stats)
+            predictions = pd.DataFrame(X_test, columns=FEATURE_COLUMNS)
+            predictions["Predicted"] = y_pred
+            predictions.to_csv(os.path.join(output_dir, "predictions.csv"), index=False)
+            result["knn"] = {"k": knn_k, "report": report}
+            if plots:
+                with measure(stats, "render"):
+                    save_plot(os.path.join(output_dir, "knn.png"), plot_knn, X_test, y_pred, knn_k)
+
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+    with open(os.path.join(output_dir, "result.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+def _init_worker():
+    # 每个进程处理一个数据集，进程内的 BLAS/OpenMP 只用一个线程，避免进程数 × 线程数超过核数
+    global _thread_limits
+    _thread_limits = threadpool_limits(limits=1)
+
+
+def _analyse_task(args):
+    path, output_dir, options = args
+    options = dict(options)
+    stats = PipelineStats() if options.pop("profile", False) else None
+    try:
+        return analyse_dataset(path, output_dir, stats=stats, **options)
+    except Exception as e:
+        return {"path": path, "output": output_dir, "error": str(e)}
+
+
+def collect_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if f.lower().endswith(DATA_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def output_dirs(files, root):
+    dirs = []
+    used = set()
+    for path in files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        unique = name
+        suffix = 2
+        while unique in used:
+            unique = f"{name}-{suffix}"
+            suffix += 1
+        used.add(unique)
+        dirs.append(os.path.join(root, unique))
+    return dirs
+
+
+def summary_row(result):
+    row = {"path": result["path"], "output": result["output"], "rows": result.get("rows"),
+           "inertia": None, "accuracy": None, "macro_f1": None, "error": result.get("error"),
+           "seconds": result.get("stats", {}).get("total_seconds")}
+    if "kmeans" in result:
+        row["inertia"] = result["kmeans"]["inertia"]
+    if "report" in result.get("knn", {}):
+        row["accuracy"] = result["knn"]["report"]["accuracy"]
+        row["macro_f1"] = result["knn"]["report"]["macro avg"]["f1-score"]
+    return row
+
+
+def run_batch(files, output, options, workers=None):
+    jobs = list(zip(files, output_dirs(files, output), [options] * len(files)))
+    if workers == 1:
+        yield from map(_analyse_task, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(_analyse_task, jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KMeans 聚类与 KNN 分类批处理（无需图形界面）")
+    parser.add_argument("inputs", nargs="+", help="数据文件或目录（目录下的所有 CSV/Excel 文件）")
+    parser.add_argument("-o", "--output", default="results", help="结果输出目录")
+    parser.add_argument("--tasks", nargs="+", default=list(TASKS), choices=TASKS)
+    parser.add_argument("--k", type=int, default=3, help="KMeans 聚类数")
+    parser.add_argument("--knn-k", type=int, default=5, help="KNN 邻居数")
+    parser.add_argument("--plots", action="store_true", help="输出 PNG 图")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    parser.add_argument("--no-cache", action="store_true", help="不读写数据集缓存")
+    parser.add_argument("--profile", action="store_true", help="记录各阶段的耗时与内存峰值，写入 result.json")
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        parser.error("没有找到任何 CSV 或 Excel 数据文件")
+
+    options = {"k": args.k, "knn_k": args.knn_k, "tasks": tuple(args.tasks),
+               "plots": args.plots, "use_cache": not args.no_cache, "profile": args.profile}
+    results = []
+    for i, result in enumerate(run_batch(files, args.output, options, args.workers), 1):
+        status = f"失败：{result['error']}" if "error" in result else "完成"
+        print(f"[{i}/{len(files)}] {result['path']} {status}")
+        results.append(result)
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    rows = [summary_row(r) for r in results]
+    with open(os.path.join(args.output, "summary.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"结果已写入 {args.output}")
+
+    failures = [r for r in results if "error" in r]
+    if failures:
+        print(f"有 {len(failures)} 个数据集处理失败")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()